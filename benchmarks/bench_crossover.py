@@ -0,0 +1,47 @@
+"""Time the crossover engine on synthetic 1M-sample curves.
+
+Requires ``dashwellviz`` to be installed (see the README)::
+
+    $ python benchmarks/bench_crossover.py
+
+"""
+
+import timeit
+
+import numpy
+
+from dashwellviz.crossover import crossover_polygons, normalize
+
+N_SAMPLES = 1_000_000
+N_PAIRS = 8
+
+
+def make_curves(n_samples, n_curves, seed=0):
+    rng = numpy.random.default_rng(seed)
+    depth = numpy.linspace(500, 5500, n_samples)
+    curves = numpy.cumsum(rng.normal(size=(n_samples, n_curves)), axis=0)
+    return depth, curves
+
+
+def main():
+    depth, curves = make_curves(N_SAMPLES, 2)
+    norm = normalize(curves)
+    a, b = norm[:, 0], norm[:, 1]
+
+    t = min(timeit.repeat(lambda: normalize(curves), number=1, repeat=5))
+    print(f"normalize, 2 x {N_SAMPLES:,} samples: {t * 1000:.1f} ms")
+
+    t = min(timeit.repeat(lambda: crossover_polygons(depth, a, b), number=1, repeat=5))
+    print(f"crossover_polygons, {N_SAMPLES:,} samples: {t * 1000:.1f} ms")
+
+    depth, curves = make_curves(N_SAMPLES, 2 * N_PAIRS)
+    norm = normalize(curves)
+    a, b = norm[:, :N_PAIRS], norm[:, N_PAIRS:]
+    t = min(timeit.repeat(lambda: crossover_polygons(depth, a, b), number=1, repeat=3))
+    print(
+        f"crossover_polygons, {N_PAIRS} pairs x {N_SAMPLES:,} samples: {t * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
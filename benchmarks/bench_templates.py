@@ -0,0 +1,76 @@
+"""Time rendering many wells with a compiled template against building each log.
+
+Requires ``dashwellviz`` to be installed (see the README)::
+
+    $ python benchmarks/bench_templates.py
+
+"""
+
+import timeit
+
+import numpy
+import pandas as pd
+
+from dashwellviz.figures import make_composite_log
+from dashwellviz.templates import LogTemplate
+
+N_WELLS = 200
+N_SAMPLES = 10_000
+CURVES = ["GR", "RD", "RS", "NPHI", "RHOB", "DT"]
+
+
+def make_wells(n_wells, n_samples, seed=0):
+    rng = numpy.random.default_rng(seed)
+    depth = numpy.linspace(500, 3000, n_samples)
+    return [
+        pd.DataFrame(
+            numpy.cumsum(rng.normal(size=(n_samples, len(CURVES))), axis=0),
+            index=depth,
+            columns=CURVES,
+        )
+        for _ in range(n_wells)
+    ]
+
+
+def main():
+    wells = make_wells(N_WELLS, N_SAMPLES)
+    lines = [["GR"], ["RD", "RS"], ["NPHI", "RHOB"], ["DT"]]
+
+    t = min(
+        timeit.repeat(
+            lambda: LogTemplate([{"curves": c} for c in lines]), number=1, repeat=3
+        )
+    )
+    print(f"LogTemplate compile, {len(lines)} tracks: {t * 1000:.1f} ms")
+
+    template = LogTemplate(
+        [
+            {"curves": ["GR"]},
+            {"curves": ["RD", "RS"]},
+            {
+                "curves": [
+                    {"name": "NPHI", "range": [40, -20]},
+                    {"name": "RHOB", "range": [-20, 40]},
+                ],
+                "fill": {"curves": ["NPHI", "RHOB"], "colors": ["yellow", None]},
+            },
+            {"curves": ["DT"]},
+        ]
+    )
+    t = min(
+        timeit.repeat(lambda: [template.render(df) for df in wells], number=1, repeat=3)
+    )
+    print(f"LogTemplate.render, {N_WELLS} wells x {N_SAMPLES:,} samples: {t:.2f} s")
+
+    t = min(
+        timeit.repeat(
+            lambda: [make_composite_log(df, lines=lines) for df in wells[:20]],
+            number=1,
+            repeat=1,
+        )
+    )
+    print(f"make_composite_log, {N_WELLS} wells (from 20): {t * N_WELLS / 20:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import numpy
+
+
+def normalize(values, axis=0):
+    """Normalize curves to zero mean and unit range.
+
+    Computes ``(x - mean) / (max - min)`` for every curve at once, ignoring
+    nulls.
+
+    Args:
+        values (array-like): 1D curve or 2D array with one curve per column.
+        axis (int): axis along which the samples lie.
+
+    Returns: numpy.ndarray of the same shape as *values*.
+
+    """
+    values = numpy.asarray(values, dtype=float)
+    mean = numpy.nanmean(values, axis=axis, keepdims=True)
+    spread = numpy.nanmax(values, axis=axis, keepdims=True) - numpy.nanmin(
+        values, axis=axis, keepdims=True
+    )
+    spread[spread == 0] = 1.0
+    return (values - mean) / spread
+
+
+def _within_run_position(lengths):
+    """Position of each element within its run, for concatenated runs."""
+    starts = numpy.cumsum(lengths) - lengths
+    return numpy.arange(lengths.sum()) - numpy.repeat(starts, lengths)
+
+
+def _polygons(x_a, x_b, y, run_starts, run_lengths):
+    """Build closed polygons (down curve A, back up curve B) for runs.
+
+    Polygons are separated by NaN so that a single plotly trace with
+    ``fill="toself"`` draws them all.
+    """
+    n = int((2 * run_lengths + 1).sum())
+    x_out = numpy.full(n, numpy.nan)
+    y_out = numpy.full(n, numpy.nan)
+    if n == 0:
+        return x_out, y_out
+
+    offsets = numpy.cumsum(2 * run_lengths + 1) - (2 * run_lengths + 1)
+    p = _within_run_position(run_lengths)
+    forward = numpy.repeat(run_starts, run_lengths) + p
+    backward = numpy.repeat(run_starts + run_lengths - 1, run_lengths) - p
+    out_forward = numpy.repeat(offsets, run_lengths) + p
+    out_backward = numpy.repeat(offsets + run_lengths, run_lengths) + p
+
+    x_out[out_forward] = x_a[forward]
+    y_out[out_forward] = y[forward]
+    x_out[out_backward] = x_b[backward]
+    y_out[out_backward] = y[backward]
+    return x_out, y_out
+
+
+def _crossover(depth, a, b, group=None):
+    """Crossover polygons for flat arrays; NaN rows split runs.
+
+    Returns a dict of sign name to ``(x, y, run_groups, run_lengths)``.
+    """
+    diff = a - b
+    sign = numpy.sign(diff)
+    sign[diff == 0] = -1
+    sign[numpy.isnan(diff) | numpy.isnan(depth)] = 0
+    if group is None:
+        group = numpy.zeros(depth.size, dtype=int)
+
+    # Points where the curves cross between two valid samples.
+    cross = numpy.flatnonzero(sign[:-1] * sign[1:] < 0)
+    frac = diff[cross] / (diff[cross] - diff[cross + 1])
+    y_cross = depth[cross] + frac * (depth[cross + 1] - depth[cross])
+    x_cross = a[cross] + frac * (a[cross + 1] - a[cross])
+
+    # Insert every crossing point twice: once closing the run above it
+    # and once opening the run below it.
+    n = depth.size + 2 * cross.size
+    shift = numpy.zeros(depth.size, dtype=int)
+    shift[cross + 1] = 2
+    orig_pos = numpy.arange(depth.size) + numpy.cumsum(shift)
+    close_pos = orig_pos[cross] + 1
+
+    y_all = numpy.empty(n)
+    x_a = numpy.empty(n)
+    x_b = numpy.empty(n)
+    s_all = numpy.empty(n, dtype=int)
+    g_all = numpy.empty(n, dtype=int)
+    y_all[orig_pos], x_a[orig_pos], x_b[orig_pos] = depth, a, b
+    s_all[orig_pos], g_all[orig_pos] = sign, group
+    for pos, s in ((close_pos, sign[cross]), (close_pos + 1, sign[cross + 1])):
+        y_all[pos], x_a[pos], x_b[pos] = y_cross, x_cross, x_cross
+        s_all[pos], g_all[pos] = s, group[cross]
+
+    # Runs of equal sign, also split at the duplicated crossing points.
+    boundary = numpy.ones(n, dtype=bool)
+    boundary[1:] = s_all[1:] != s_all[:-1]
+    boundary[close_pos + 1] = True
+    starts = numpy.flatnonzero(boundary)
+    lengths = numpy.diff(numpy.append(starts, n))
+    run_sign = s_all[starts]
+
+    result = {}
+    for key, s in (("positive", 1), ("negative", -1)):
+        keep = run_sign == s
+        x, y = _polygons(x_a, x_b, y_all, starts[keep], lengths[keep])
+        result[key] = (x, y, g_all[starts[keep]], lengths[keep])
+    return result
+
+
+def crossover_polygons(depth, a, b):
+    """Compute the fill polygons between two curves.
+
+    The "positive" region is where curve *a* is greater than curve *b*
+    (e.g. the neutron-density gas effect when plotting normalized neutron
+    and density) and the "negative" region is the rest. Crossing points are
+    interpolated so that adjacent polygons meet exactly.
+
+    Args:
+        depth (array-like): depths, shape (n_samples,).
+        a (array-like): first curve, shape (n_samples,) or, for a batch of
+            curve pairs, (n_samples, n_pairs).
+        b (array-like): second curve, same shape as *a*.
+
+    Null samples in either curve break the polygons.
+
+    Returns: dict with keys "positive" and "negative", each an ``(x, y)``
+        tuple of numpy arrays with polygons separated by NaN, ready for a
+        plotly trace with ``fill="toself"``. For a batch of pairs, a list of
+        such dicts is returned, one per pair.
+
+    """
+    depth = numpy.asarray(depth, dtype=float)
+    a = numpy.asarray(a, dtype=float)
+    b = numpy.asarray(b, dtype=float)
+    if a.shape != b.shape:
+        raise ValueError(f"Curve shapes differ: {a.shape} and {b.shape}")
+    if a.ndim == 1:
+        return {key: (x, y) for key, (x, y, _, _) in _crossover(depth, a, b).items()}
+
+    # Stack the pairs end to end with a null row between them so that all
+    # pairs are handled in one pass, then split the output back up.
+    n_samples, n_pairs = a.shape
+    pad = numpy.full((1, n_pairs), numpy.nan)
+    flat_a = numpy.vstack([a, pad]).ravel(order="F")
+    flat_b = numpy.vstack([b, pad]).ravel(order="F")
+    flat_depth = numpy.tile(numpy.append(depth, numpy.nan), n_pairs)
+    group = numpy.repeat(numpy.arange(n_pairs), n_samples + 1)
+
+    results = [{} for _ in range(n_pairs)]
+    for key, (x, y, run_groups, run_lengths) in _crossover(
+        flat_depth, flat_a, flat_b, group
+    ).items():
+        ends = numpy.append(0, numpy.cumsum(2 * run_lengths + 1))
+        splits = ends[numpy.searchsorted(run_groups, numpy.arange(1, n_pairs))]
+        for i, (xs, ys) in enumerate(
+            zip(numpy.split(x, splits), numpy.split(y, splits))
+        ):
+            results[i][key] = (xs, ys)
+    return results
@@ -1,12 +1,80 @@
+import re
 import textwrap
 
 from plotly.subplots import make_subplots
 import plotly.graph_objs as go
 import seaborn as sns
 
+from dashwellviz.crossover import crossover_polygons, normalize
+from dashwellviz.qc import qc_track_trace
+from dashwellviz.resample import align_curves
 from dashwellviz.utils import to_plotly_rgb
 
-import numpy
+
+class AxisAllocator:
+    """Keep track of the axis ids used by a plotly Figure.
+
+    The figure layout and traces are scanned once on creation; after that,
+    new ids are handed out in order, skipping any axis that has since been
+    added to the figure layout by other means (e.g. by another allocator).
+
+    Args:
+        fig (plotly go.Figure object)
+
+    Attributes:
+        fig (plotly go.Figure object)
+        used (dict): set of used axis numbers for each of "x" and "y". The
+            first axis ("xaxis", referred to as "x" by traces) is number 1.
+
+    """
+
+    _layout_key_re = re.compile(r"^([xy])axis(\d*)$")
+    _trace_ref_re = re.compile(r"^([xy])(\d*)$")
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.used = {"x": set(), "y": set()}
+        for key in fig.layout.to_plotly_json():
+            self._register(self._layout_key_re.match(key))
+        for trace in fig.data:
+            for letter in ("x", "y"):
+                ref = getattr(trace, f"{letter}axis", None)
+                if ref:
+                    self._register(self._trace_ref_re.match(ref))
+        self._next = {
+            letter: max(numbers, default=0) + 1 for letter, numbers in self.used.items()
+        }
+
+    def _register(self, match):
+        if match:
+            letter, number = match.groups()
+            self.used[letter].add(int(number) if number else 1)
+
+    def allocate(self, letter="x"):
+        """Reserve the next unused axis number.
+
+        Args:
+            letter (str): "x" or "y"
+
+        Returns: int
+
+        """
+        number = self._next[letter]
+        while self.layout_key(letter, number) in self.fig.layout:
+            number += 1
+        self._next[letter] = number + 1
+        self.used[letter].add(number)
+        return number
+
+    @staticmethod
+    def layout_key(letter, number):
+        """Layout property name for an axis, e.g. ``"xaxis3"``."""
+        return f"{letter}axis" if number == 1 else f"{letter}axis{number}"
+
+    @staticmethod
+    def trace_ref(letter, number):
+        """Trace reference for an axis, e.g. ``"x3"``."""
+        return letter if number == 1 else f"{letter}{number}"
 
 
 class WellLog:
@@ -15,15 +83,18 @@ class WellLog:
     Args:
         n_tracks (int): number of vertical tracks.
         shared_yaxes (bool): shared Y axes for all tracks?
+        overlay_spacing (float): height of each overlaid x axis added by
+            ``add_overlay_traces()``, as a fraction of the figure height.
 
     Other keyword arguments will be passed to plotly.make_subplots()
 
     Attributes:
         fig (plotly go.Figure object)
+        axes (AxisAllocator): axis ids used by ``fig``
 
     """
 
-    def __init__(self, n_tracks, shared_yaxes=True, **kwargs):
+    def __init__(self, n_tracks, shared_yaxes=True, overlay_spacing=0.06, **kwargs):
         self.fig = make_subplots(
             rows=1,
             cols=n_tracks,
@@ -31,6 +102,11 @@ class WellLog:
             shared_yaxes=shared_yaxes,
             **kwargs,
         )
+        self.axes = AxisAllocator(self.fig)
+        self.n_tracks = n_tracks
+        self.overlay_spacing = overlay_spacing
+        # Layout keys of the overlaid x axes in each track, bottom to top.
+        self._overlays = {}
 
     def update_track_titles(self, track_titles):
         """Update track/subplot title(s).
@@ -85,13 +161,80 @@ class WellLog:
             name = graph_obj.name
         self.fig.add_trace(graph_obj, row=1, col=track_no + 1, **kwargs)
 
+    def add_overlay_traces(self, graph_objs, track_no=0, axis_kwargs=None):
+        """Add traces to a track, each with its own overlaid x axis.
+
+        This allows several curves with independent scales to share a track.
+        The overlaid axes are stacked above the track, one per
+        *overlay_spacing*, and the tracks are shortened to make room for the
+        tallest stack. All the traces and axes are added with a single
+        layout update.
+
+        Args:
+            graph_objs (list): plotly graph objects
+            track_no (int): zero-indexed track/column number
+            axis_kwargs (list of dicts, optional): layout properties for the
+                x axis of each trace e.g. ``{"range": [0.45, -0.15]}`` or
+                ``{"type": "log"}``. By default the axes are overlaid on the
+                track's x axis, drawn above it and titled with the trace name.
+
+        Returns: list of the new x axis layout keys e.g. ``["xaxis5", "xaxis6"]``
+
+        """
+        if axis_kwargs is None:
+            axis_kwargs = [{}] * len(graph_objs)
+        x_ref = AxisAllocator.trace_ref("x", track_no + 1)
+        y_ref = AxisAllocator.trace_ref("y", track_no + 1)
+        track_xaxis = self.fig.layout[AxisAllocator.layout_key("x", track_no + 1)]
+
+        layout = {}
+        for graph_obj, kwargs in zip(graph_objs, axis_kwargs):
+            number = self.axes.allocate("x")
+            x_new = AxisAllocator.trace_ref("x", number)
+            graph_obj.update(xaxis=x_new, yaxis=y_ref)
+            axis = dict(
+                overlaying=x_ref,
+                anchor="free",
+                side="top",
+                domain=track_xaxis.domain,
+                title={"text": graph_obj.name},
+            )
+            axis.update(kwargs or {})
+            layout[AxisAllocator.layout_key("x", number)] = axis
+        new_keys = list(layout)
+        self._overlays.setdefault(track_no, []).extend(new_keys)
+
+        # Restack every overlaid axis, as the tallest stack may have grown.
+        top = 1 - self.overlay_spacing * max(len(k) for k in self._overlays.values())
+        for keys in self._overlays.values():
+            for i, key in enumerate(keys):
+                layout.setdefault(key, {})["position"] = top + i * self.overlay_spacing
+        for number in self.axes.used["y"]:
+            layout[AxisAllocator.layout_key("y", number)] = {"domain": [0, top]}
+        # Track titles sit on top of each track's stack.
+        for track in range(self.n_tracks):
+            layout[f"annotations[{track}].y"] = (
+                top + len(self._overlays.get(track, [])) * self.overlay_spacing
+            )
+
+        self.fig.update_layout(layout)
+        self.fig.add_traces(list(graph_objs))
+        return new_keys
+
 
 def make_scatter(series, **kwargs):
     return go.Scatter(x=series.values, y=series.index, **kwargs)
 
 
 def make_composite_log(
-    df, lines=(), log_tracks=(), lines_func=make_scatter, line_kwargs=None
+    df,
+    lines=(),
+    log_tracks=(),
+    lines_func=make_scatter,
+    line_kwargs=None,
+    step=None,
+    methods=None,
+    qc_flags=None,
 ):
     """Make a composite well log from a pandas.DataFrame.
 
@@ -110,6 +253,14 @@ def make_composite_log(
             returns a plotly graph object e.g. ``go.Scatter``
         line_kwargs (dict): dictionary which is passed also for each
             call to lines_func. Default is `{"mode": "lines", "line": {"width": 1}}`
+        step (float, optional): if given, the curves are first resampled onto
+            a common depth grid with this sample interval, see
+            ``dashwellviz.resample.align_curves()``.
+        methods (dict, optional): resampling method for each column name,
+            only used with *step*.
+        qc_flags (pandas.DataFrame, optional): QC flags from
+            ``dashwellviz.qc.qc_curves()``. If given, an extra track on the
+            right shows where the plotted curves are flagged.
 
     Returns: ``WellLog`` object with a plotly ``Figure`` as the ``fig``
         attribute.
@@ -119,17 +270,28 @@ def make_composite_log(
         line_kwargs = {"mode": "lines", "line": {"width": 1}}
     n_tracks = max([len(lines)])
 
-    columns = []
-    log = WellLog(n_tracks=n_tracks)
+    # A curve may be drawn in more than one track.
+    columns = list(
+        dict.fromkeys(column for column_names in lines for column in column_names)
+    )
+    if step is not None:
+        df = align_curves(df[columns], step=step, methods=methods)
+
+    log = WellLog(n_tracks=n_tracks if qc_flags is None else n_tracks + 1)
     for i, column_names in enumerate(lines):
         log.update_track_titles({i: ", ".join(column_names)})
         for column in column_names:
             log.add_trace(
                 lines_func(df[column], name=column, **line_kwargs), track_no=i,
             )
-            columns.append(column)
 
-    data_range = df[columns].dropna(how="any")
+    if qc_flags is not None:
+        log.update_track_titles({n_tracks: "QC"})
+        qc_columns = [c for c in columns if c in qc_flags.columns]
+        log.add_trace(qc_track_trace(qc_flags, qc_columns), track_no=n_tracks)
+
+    # Span every curve, not just the interval where all curves overlap.
+    data_range = df[columns].dropna(how="all")
     log.fig.update_yaxes(range=(max(data_range.index), min(data_range.index)))
 
     for track_no in log_tracks:
@@ -145,6 +307,48 @@ def make_composite_log(
     return log
 
 
+def make_cross_plot(df, x, y, color=None, step=None, methods=None, **kwargs):
+    """Make a cross plot of two curves from a pandas.DataFrame.
+
+    Args:
+        df (pandas.DataFrame): the index should be the depth.
+        x (str): column name for the x axis.
+        y (str): column name for the y axis.
+        color (str, optional): column name used to colour the markers.
+        step (float, optional): if given, the curves are first resampled onto
+            a common depth grid with this sample interval, so that curves
+            sampled at different depths can be plotted against each other.
+            See ``dashwellviz.resample.align_curves()``.
+        methods (dict, optional): resampling method for each column name,
+            only used with *step*.
+
+    Other keyword arguments are passed to the ``marker`` of the
+    ``go.Scatter`` trace.
+
+    Returns: plotly Figure.
+
+    """
+    columns = list(dict.fromkeys(c for c in (x, y, color) if c is not None))
+    dff = df[columns]
+    if step is not None:
+        dff = align_curves(dff, step=step, methods=methods)
+    dff = dff.dropna(how="any")
+
+    marker = dict(size=8, line=dict(color="black", width=1))
+    if color is not None:
+        marker.update(color=dff[color], colorscale="turbid", showscale=True)
+    marker.update(kwargs)
+
+    fig = go.Figure(
+        data=go.Scatter(
+            x=dff[x], y=dff[y], mode="markers", opacity=0.7, marker=marker,
+        )
+    )
+    fig.update_xaxes(title_text=x)
+    fig.update_yaxes(title_text=y)
+    fig.update_layout(template="plotly_white")
+    return fig
+
 
 def dummy_trace_for_legend_heading(html_label):
     return go.Scatter(
@@ -155,44 +359,67 @@ def dummy_trace_for_legend_heading(html_label):
         line={"color": "rgba(0, 0, 0, 0)"},
     )
 
-def cross_over_log(df, series_1_name, series_2_name, normalized=True, dropna=True):
+def cross_over_log(
+    df,
+    series_1_name,
+    series_2_name,
+    normalized=True,
+    dropna=True,
+    fill_colors=("lightblue", None),
+):
+    """Plot two curves in one track, shading where they cross over.
+
+    Args:
+        df (pandas.DataFrame): the index should be the depth.
+        series_1_name (str): column name of the first curve.
+        series_2_name (str): column name of the second curve.
+        normalized (bool): normalize both curves onto a common axis and shade
+            between them. If False, each curve gets its own x axis and no
+            shading is drawn.
+        dropna (bool): drop depths where either curve is null. If False,
+            nulls break the curves and the shading.
+        fill_colors (tuple): fill colours for where the first curve is greater
+            than the second, and for the rest. None skips that fill.
+
+    Returns: plotly Figure.
+
+    """
+    dff = df.loc[:, [series_1_name, series_2_name]]
     if dropna:
-        dff = df.loc[:, [series_1_name, series_2_name]].dropna()
+        dff = dff.dropna()
     if normalized:
-        return _cross_over_log_norm(dff, series_1_name, series_2_name)
+        return _cross_over_log_norm(dff, series_1_name, series_2_name, fill_colors)
     else:
         return _cross_over_log_same_axis(dff, series_1_name, series_2_name)
 
-def _cross_over_log_norm(df, series_1_name, series_2_name):
 
-    series_1 = df.loc[:, series_1_name]
-    series_2 = df.loc[:, series_2_name]
+def _cross_over_log_norm(df, series_1_name, series_2_name, fill_colors):
 
-    series_1_norm = (series_1 - series_1.mean()) / (series_1.max() - series_1.min())
-    series_2_norm = (series_2 - series_2.mean()) / (series_2.max() - series_2.min())
+    depth = df.index.to_numpy(dtype=float)
+    norm = normalize(df.loc[:, [series_1_name, series_2_name]].to_numpy())
+    polygons = crossover_polygons(depth, norm[:, 0], norm[:, 1])
 
     traces = []
-    for data in [series_1_norm, series_2_norm]:
+    for (x, y), color in zip(polygons.values(), fill_colors):
+        if color is None or x.size == 0:
+            continue
         traces.append(
             go.Scatter(
-                x = data,
-                y = data.index,
-                name=data.name,
-                line=dict(width=0.5),
+                x=x,
+                y=y,
+                showlegend=False,
+                hoverinfo="skip",
+                fill="toself",
+                fillcolor=color,
+                mode="lines",
+                line=dict(width=0),
             )
         )
 
-    traces[1].update(fill = 'tonextx')
-
-    traces.append(
-        go.Scatter(
-            x=numpy.max((series_1_norm, series_2_norm), axis=0),
-            y=df.index,
-            showlegend=False,
-            fill='tonextx',
-            line=dict(color='lightblue', width=0),
+    for i, name in enumerate([series_1_name, series_2_name]):
+        traces.append(
+            go.Scatter(x=norm[:, i], y=depth, name=name, line=dict(width=0.5))
         )
-    )
 
     layout = {}
 
@@ -240,7 +467,7 @@ def _cross_over_log_same_axis(df, series_1_name, series_2_name):
     fig.update_layout(template='plotly_white', height=800, width=350)
     return fig
 
-def add_multiaxis_to_subplot_fig(fig, multiaxis_fig, row, col):
+def add_multiaxis_to_subplot_fig(fig, multiaxis_fig, row, col, axes=None):
     """Add a Figure with multiple Xaxis to a sunplot figure
 
     Args:
@@ -248,6 +475,10 @@ def add_multiaxis_to_subplot_fig(fig, multiaxis_fig, row, col):
         multiaxis_fig ([type]): A figure with multiple x axis, created using `_cross_over_log_same_axis`
         row (int): row to add new figure to
         col (int): Column to add new figure to
+        axes (AxisAllocator, optional): axis ids used by *fig*, e.g. ``WellLog.axes``.
+            Pass the same one to each call to avoid rescanning *fig*; by default
+            a new one is made from *fig*. Either way, axes already in the
+            layout of *fig* are never reused.
 
     Returns:
         Plotly.Figure: input fig with the multiaxis fig in the given row and given column
@@ -264,17 +495,17 @@ def add_multiaxis_to_subplot_fig(fig, multiaxis_fig, row, col):
     trace_to_change = fig.data[-1]
 
     # Update the xaxis with a new one that doesn't exists
-    axis_numbers = [ax.plotly_name[-1] for ax in fig.select_xaxes()]
-    # axis 0 doesnt have a number
-    axis_numbers.pop(axis_numbers.index('s'))
-    new_axis_nb = str(int(max(axis_numbers)) + 1)
-    trace_to_change.xaxis = 'x' + new_axis_nb
+    if axes is None:
+        axes = AxisAllocator(fig)
+    new_axis_nb = axes.allocate("x")
+    trace_to_change.xaxis = AxisAllocator.trace_ref("x", new_axis_nb)
 
     # update layout
     # Get the layout with the overlaying xaxis from before and update it
-    _xaxis = multiaxis_fig.layout['xaxis2']
+    _xaxis = multiaxis_fig.layout['xaxis2'].to_plotly_json()
     _xaxis['overlaying'] = fig.data[-2]['xaxis']
-    fig.update_layout({'xaxis' + new_axis_nb: _xaxis})
+    _xaxis['anchor'] = fig.data[-2]['yaxis']
+    fig.update_layout({AxisAllocator.layout_key("x", new_axis_nb): _xaxis})
     return fig
 
 def draw_strat(
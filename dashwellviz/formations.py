@@ -0,0 +1,290 @@
+import numpy
+import pandas as pd
+import plotly.graph_objs as go
+
+
+def load_tops(filename, name_col=None, depth_col=None):
+    """Load formation tops e.g. ``Data/Poseidon1_tops.csv``.
+
+    Args:
+        filename (str): CSV file with one row per formation top.
+        name_col (str, optional): column with the formation names. Default is
+            the first column with "formation" in its name.
+        depth_col (str, optional): column with the top depths. Default is
+            the first column with "md" in its name (e.g. "MDRT").
+
+    A row of units under the header (e.g. ``(m),(m),(m),``) is skipped.
+
+    Returns: pandas.DataFrame with columns "formation" and "top", sorted by
+        depth.
+
+    """
+    df = pd.read_csv(filename)
+    if name_col is None:
+        name_col = next(c for c in df.columns if "formation" in c.lower())
+    if depth_col is None:
+        depth_col = next(c for c in df.columns if "md" in c.lower())
+    tops = pd.DataFrame(
+        {
+            "formation": df[name_col],
+            "top": pd.to_numeric(df[depth_col], errors="coerce"),
+        }
+    )
+    return tops.dropna().sort_values("top", kind="stable").reset_index(drop=True)
+
+
+def tops_to_intervals(tops, base=numpy.inf):
+    """Convert formation tops to intervals, e.g. for ``draw_strat()``.
+
+    Each formation extends down to the next deeper top. Where several
+    formations share a top depth (e.g. a formation and its first member)
+    only the last one listed is kept.
+
+    Args:
+        tops (pandas.DataFrame): see ``load_tops()``.
+        base (float): base of the deepest formation.
+
+    Returns: pandas.DataFrame with columns "depth_from", "depth_to" and "label".
+
+    """
+    tops = tops.drop_duplicates("top", keep="last")
+    return pd.DataFrame(
+        {
+            "depth_from": tops["top"].to_numpy(),
+            "depth_to": numpy.append(tops["top"].to_numpy()[1:], base),
+            "label": tops["formation"].to_numpy(),
+        }
+    )
+
+
+def assign_formations(depth, tops):
+    """Find the formation of each depth sample.
+
+    Args:
+        depth (array-like)
+        tops (pandas.DataFrame): see ``load_tops()``. Where several
+            formations share a top depth, the last one listed is used.
+
+    Returns: numpy.ndarray (object) of formation names; None above the
+        first top.
+
+    """
+    tops = tops.sort_values("top", kind="stable")
+    names = numpy.append(tops["formation"].to_numpy(dtype=object), None)
+    idx = numpy.searchsorted(tops["top"].to_numpy(dtype=float), depth, side="right")
+    # idx - 1 is the formation above; -1 (above the first top) wraps to None.
+    return names[idx - 1]
+
+
+def _group_samples(wells, tops, curves):
+    """Concatenate the samples of all wells with a (well, formation) group key.
+
+    Returns: tuple of group keys, sample thicknesses, dict of curve values,
+        well names and formation names. The group key of a sample is
+        ``well_no * len(formation names) + formation_no``; samples outside
+        any formation are dropped.
+    """
+    well_names = [w for w in wells if w in tops]
+    formations = pd.unique(
+        numpy.concatenate(
+            [tops[w]["formation"].to_numpy() for w in well_names]
+            or [numpy.array([], dtype=object)]
+        )
+    )
+    formation_codes = {name: i for i, name in enumerate(formations)}
+
+    keys, thickness = [], []
+    values = {curve: [] for curve in curves}
+    for well_no, well in enumerate(well_names):
+        df = wells[well]
+        well_tops = tops[well].sort_values("top", kind="stable")
+        codes = numpy.append(
+            well_tops["formation"].map(formation_codes).to_numpy(dtype=int), -1
+        )
+        depth = df.index.to_numpy(dtype=float)
+        code = codes[
+            numpy.searchsorted(well_tops["top"].to_numpy(dtype=float), depth, "right")
+            - 1
+        ]
+
+        # Each sample stands for half the interval to its neighbours, ignoring
+        # steps across gaps in the depth index.
+        step = numpy.diff(depth)
+        usual = numpy.median(step) if step.size else 0.0
+        step = numpy.where(step > 2 * usual, usual, step)
+        half = numpy.concatenate([[0.0], step / 2]) + numpy.concatenate(
+            [step / 2, [0.0]]
+        )
+
+        inside = code >= 0
+        keys.append(well_no * len(formations) + code[inside])
+        thickness.append(half[inside])
+        for curve in curves:
+            if curve in df:
+                column = df[curve].to_numpy(dtype=float)[inside]
+            else:
+                column = numpy.full(inside.sum(), numpy.nan)
+            values[curve].append(column)
+
+    keys = numpy.concatenate(keys) if keys else numpy.array([], dtype=int)
+    thickness = numpy.concatenate(thickness) if thickness else numpy.array([])
+    values = {
+        curve: numpy.concatenate(v) if v else numpy.array([])
+        for curve, v in values.items()
+    }
+    return keys, thickness, values, well_names, list(formations)
+
+
+def _group_labels(groups, well_names, formations):
+    n = len(formations)
+    return (
+        numpy.asarray(well_names, dtype=object)[groups // n],
+        numpy.asarray(formations, dtype=object)[groups % n],
+    )
+
+
+def _grouped_percentiles(keys, values, n_groups, percentiles):
+    """Percentiles of *values* within each group, linearly interpolated."""
+    order = numpy.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    counts = numpy.bincount(keys, minlength=n_groups)
+    starts = numpy.cumsum(counts) - counts
+    out = {}
+    for p in percentiles:
+        position = starts + (counts - 1) * p / 100
+        lo = numpy.floor(position).astype(int)
+        hi = numpy.ceil(position).astype(int)
+        valid = counts > 0
+        result = numpy.full(n_groups, numpy.nan)
+        frac = position[valid] - lo[valid]
+        result[valid] = values[lo[valid]] * (1 - frac) + values[hi[valid]] * frac
+        out[p] = result
+    return out
+
+
+def formation_stats(wells, tops, curves, percentiles=(10, 50, 90)):
+    """Aggregate curves per well and formation.
+
+    Args:
+        wells (dict): well name to pandas.DataFrame (depth index).
+        tops (dict): well name to formation tops, see ``load_tops()``.
+            Wells without tops are skipped.
+        curves (list): curve names to aggregate.
+        percentiles (tuple): percentiles to compute, from 0 to 100.
+
+    Returns: pandas.DataFrame with one row per well, formation and curve
+        and columns "well", "formation", "curve", "count", "mean", "std" and
+        "p10", "p50", "p90" etc. Groups with no samples are left out.
+
+    """
+    keys, _, values, well_names, formations = _group_samples(wells, tops, curves)
+    n_groups = len(well_names) * len(formations)
+
+    tables = []
+    for curve in curves:
+        v = values[curve]
+        valid = numpy.isfinite(v)
+        k, v = keys[valid], v[valid]
+        count = numpy.bincount(k, minlength=n_groups)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            mean = numpy.bincount(k, weights=v, minlength=n_groups) / count
+            mean_sq = numpy.bincount(k, weights=v**2, minlength=n_groups) / count
+        stats = {
+            "count": count,
+            "mean": mean,
+            "std": numpy.sqrt(numpy.maximum(mean_sq - mean**2, 0)),
+        }
+        for p, result in _grouped_percentiles(k, v, n_groups, percentiles).items():
+            stats[f"p{p:g}"] = result
+
+        groups = numpy.flatnonzero(count > 0)
+        well, formation = _group_labels(groups, well_names, formations)
+        table = pd.DataFrame({name: s[groups] for name, s in stats.items()})
+        table.insert(0, "curve", curve)
+        table.insert(0, "formation", formation)
+        table.insert(0, "well", well)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+def net_thickness(wells, tops, cutoffs):
+    """Gross and net thickness per well and formation.
+
+    Args:
+        wells (dict): well name to pandas.DataFrame (depth index).
+        tops (dict): well name to formation tops, see ``load_tops()``.
+        cutoffs (dict): name of each net thickness to a tuple of
+            ``(curve, operator, value)``, where operator is one of "<",
+            "<=", ">" or ">=". E.g. ``{"net_sand": ("GR", "<", 75)}``.
+
+    Returns: pandas.DataFrame with one row per well and formation and columns
+        "well", "formation", "gross", and for each cutoff the net thickness
+        and the net to gross ratio (suffixed "_ntg").
+
+    """
+    operators = {
+        "<": numpy.less,
+        "<=": numpy.less_equal,
+        ">": numpy.greater,
+        ">=": numpy.greater_equal,
+    }
+    curves = list(dict.fromkeys(curve for curve, _, _ in cutoffs.values()))
+    keys, thickness, values, well_names, formations = _group_samples(
+        wells, tops, curves
+    )
+    n_groups = len(well_names) * len(formations)
+
+    gross = numpy.bincount(keys, weights=thickness, minlength=n_groups)
+    groups = numpy.flatnonzero(numpy.bincount(keys, minlength=n_groups) > 0)
+    well, formation = _group_labels(groups, well_names, formations)
+    table = pd.DataFrame({"well": well, "formation": formation, "gross": gross[groups]})
+    for name, (curve, operator, value) in cutoffs.items():
+        with numpy.errstate(invalid="ignore"):
+            passes = operators[operator](values[curve], value)
+        net = numpy.bincount(keys, weights=thickness * passes, minlength=n_groups)
+        table[name] = net[groups]
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            table[f"{name}_ntg"] = net[groups] / gross[groups]
+    return table
+
+
+def make_formation_summary(table, value, curve=None, formation_order=None, **kwargs):
+    """Heatmap of a per-formation aggregate across wells.
+
+    Args:
+        table (pandas.DataFrame): output of ``formation_stats()`` or
+            ``net_thickness()``.
+        value (str): column to show e.g. "mean", "p50" or "net_sand_ntg".
+        curve (str, optional): curve to show, for ``formation_stats()``
+            output.
+        formation_order (list, optional): formations from top to bottom.
+            Default is the order they first appear in *table*.
+
+    Other keyword arguments are passed to ``go.Heatmap``.
+
+    Returns: plotly Figure with wells along the x axis and formations down
+        the y axis.
+
+    """
+    if curve is not None:
+        table = table[table["curve"] == curve]
+    grid = table.pivot(index="formation", columns="well", values=value)
+    if formation_order is None:
+        formation_order = list(pd.unique(table["formation"]))
+    grid = grid.reindex([f for f in formation_order if f in grid.index])
+
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=grid.to_numpy(),
+            x=list(grid.columns),
+            y=list(grid.index),
+            colorbar={"title": {"text": value}},
+            **kwargs,
+        )
+    )
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(
+        template="plotly_white",
+        title_text=f"{curve} {value}" if curve is not None else value,
+    )
+    return fig
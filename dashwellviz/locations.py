@@ -0,0 +1,283 @@
+import numpy
+import pandas as pd
+import plotly.graph_objs as go
+
+
+def load_well_headers(filename="Data/Well_Headers.csv"):
+    """Load well headers e.g. from ``Data/Well_Headers.csv``.
+
+    Args:
+        filename (str): CSV file with one row per well and at least the
+            columns "Name", "X" and "Y".
+
+    Returns: pandas.DataFrame
+
+    """
+    return pd.read_csv(filename)
+
+
+def _concat_ranges(starts, stops):
+    """Concatenate ``range(start, stop)`` for each pair, vectorized."""
+    lengths = stops - starts
+    offsets = numpy.cumsum(lengths) - lengths
+    return numpy.repeat(starts - offsets, lengths) + numpy.arange(lengths.sum())
+
+
+class WellLocations:
+    """Spatial index over well locations.
+
+    Wells are bucketed into a regular grid of square cells, so that
+    bounding box, radius and nearest-N queries only look at the wells in
+    nearby cells.
+
+    Args:
+        names (array-like): well names.
+        x (array-like): easting of each well.
+        y (array-like): northing of each well.
+        cell_size (float, optional): grid cell size in the same units as
+            *x* and *y*. By default chosen to give about four wells per cell.
+
+    Wells with a missing (non-finite) coordinate are kept in the index by
+    name but left out of the grid, so spatial queries never return them.
+
+    Attributes:
+        names (numpy.ndarray)
+        x (numpy.ndarray)
+        y (numpy.ndarray)
+        located (numpy.ndarray): positions of the wells with valid
+            coordinates.
+
+    """
+
+    def __init__(self, names, x, y, cell_size=None):
+        self.names = numpy.asarray(names, dtype=object)
+        self.x = numpy.asarray(x, dtype=float)
+        self.y = numpy.asarray(y, dtype=float)
+        self._name_index = {name: i for i, name in enumerate(self.names)}
+        self.located = numpy.flatnonzero(
+            numpy.isfinite(self.x) & numpy.isfinite(self.y)
+        )
+        x, y = self.x[self.located], self.y[self.located]
+
+        if x.size:
+            self.x0, self.y0 = x.min(), y.min()
+            width, height = x.max() - self.x0, y.max() - self.y0
+        else:
+            self.x0 = self.y0 = width = height = 0.0
+        if cell_size is None:
+            area = max(width * height, width**2, height**2)
+            cell_size = numpy.sqrt(area * 4 / x.size) if area > 0 else 1.0
+        self.cell_size = float(cell_size)
+        self.nx = int(width // self.cell_size) + 1
+        self.ny = int(height // self.cell_size) + 1
+
+        cells = self._cell_y(y) * self.nx + self._cell_x(x)
+        order = numpy.argsort(cells, kind="stable")
+        self._order = self.located[order]
+        self._cell_start = numpy.searchsorted(
+            cells[order], numpy.arange(self.nx * self.ny + 1)
+        )
+
+    @classmethod
+    def from_headers(cls, df, name_col="Name", x_col="X", y_col="Y", **kwargs):
+        """Create the index from a well headers DataFrame.
+
+        See ``load_well_headers()``. Other keyword arguments are passed to
+        ``WellLocations()``.
+        """
+        return cls(df[name_col], df[x_col], df[y_col], **kwargs)
+
+    def __len__(self):
+        return self.names.size
+
+    def _cell_x(self, x):
+        return numpy.clip((x - self.x0) // self.cell_size, 0, self.nx - 1).astype(int)
+
+    def _cell_y(self, y):
+        return numpy.clip((y - self.y0) // self.cell_size, 0, self.ny - 1).astype(int)
+
+    def index_of(self, name):
+        """Position of a well in the index, by name."""
+        try:
+            return self._name_index[name]
+        except KeyError:
+            raise KeyError(f"Could not find well '{name}'")
+
+    def within_bounds(self, xmin, ymin, xmax, ymax):
+        """Find the wells inside a bounding box.
+
+        Returns: numpy.ndarray of well positions in the index.
+
+        """
+        if xmax < self.x0 or ymax < self.y0:
+            return numpy.array([], dtype=int)
+        ix0, ix1 = self._cell_x(numpy.array([xmin, xmax]))
+        iy0, iy1 = self._cell_y(numpy.array([ymin, ymax]))
+
+        # Cells are numbered row by row, so each row of the box is one
+        # contiguous run of the sorted wells.
+        rows = numpy.arange(iy0, iy1 + 1) * self.nx
+        candidates = self._order[
+            _concat_ranges(
+                self._cell_start[rows + ix0], self._cell_start[rows + ix1 + 1]
+            )
+        ]
+        x, y = self.x[candidates], self.y[candidates]
+        inside = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+        return candidates[inside]
+
+    def within_radius(self, x, y, radius):
+        """Find the wells within *radius* of a point.
+
+        Returns: tuple of numpy.ndarray: well positions in the index and
+            their distances, sorted by distance.
+
+        """
+        candidates = self.within_bounds(x - radius, y - radius, x + radius, y + radius)
+        distance = numpy.hypot(self.x[candidates] - x, self.y[candidates] - y)
+        inside = distance <= radius
+        candidates, distance = candidates[inside], distance[inside]
+        order = numpy.argsort(distance, kind="stable")
+        return candidates[order], distance[order]
+
+    def nearest(self, x, y, n=5):
+        """Find the *n* wells nearest to a point.
+
+        Returns: tuple of numpy.ndarray: well positions in the index and
+            their distances, sorted by distance.
+
+        """
+        n = min(n, self.located.size)
+        radius = self.cell_size
+        while True:
+            candidates, distance = self.within_radius(x, y, radius)
+            if candidates.size >= n:
+                return candidates[:n], distance[:n]
+            radius *= 2
+
+    def nearby(self, name, n=5):
+        """Find the *n* wells nearest to a well, excluding itself.
+
+        Args:
+            name (str): well name.
+            n (int): number of wells.
+
+        Returns: pandas.DataFrame with columns "name", "x", "y" and "distance".
+
+        """
+        i = self.index_of(name)
+        if not (numpy.isfinite(self.x[i]) and numpy.isfinite(self.y[i])):
+            raise ValueError(f"Well '{name}' has no location")
+        candidates, distance = self.nearest(self.x[i], self.y[i], n + 1)
+        keep = candidates != i
+        candidates, distance = candidates[keep][:n], distance[keep][:n]
+        return pd.DataFrame(
+            {
+                "name": self.names[candidates],
+                "x": self.x[candidates],
+                "y": self.y[candidates],
+                "distance": distance,
+            }
+        )
+
+
+def cluster_points(x, y, bounds, max_points):
+    """Merge points into grid clusters so that at most about *max_points* remain.
+
+    Args:
+        x (numpy.ndarray)
+        y (numpy.ndarray)
+        bounds (tuple): (xmin, ymin, xmax, ymax) of the area to grid.
+        max_points (int)
+
+    Returns: tuple of numpy.ndarray: x and y of each cluster centroid, and
+        the number of points in each cluster.
+
+    """
+    xmin, ymin, xmax, ymax = bounds
+    n_side = max(int(numpy.sqrt(max_points)), 1)
+    ix = numpy.clip(
+        ((x - xmin) / max(xmax - xmin, 1e-9) * n_side).astype(int), 0, n_side - 1
+    )
+    iy = numpy.clip(
+        ((y - ymin) / max(ymax - ymin, 1e-9) * n_side).astype(int), 0, n_side - 1
+    )
+    cell = iy * n_side + ix
+
+    counts = numpy.bincount(cell, minlength=n_side**2)
+    occupied = counts > 0
+    counts = counts[occupied]
+    cx = numpy.bincount(cell, weights=x, minlength=n_side**2)[occupied] / counts
+    cy = numpy.bincount(cell, weights=y, minlength=n_side**2)[occupied] / counts
+    return cx, cy, counts
+
+
+def make_well_map(locations, bounds=None, highlight=(), max_points=2000):
+    """Make a map of well locations.
+
+    Args:
+        locations (WellLocations)
+        bounds (tuple, optional): (xmin, ymin, xmax, ymax) of the area to
+            show, e.g. the current zoom of the map. Default is all wells.
+        highlight (list): names of wells to mark and label, e.g. the
+            selected well and the wells near it.
+        max_points (int): if more wells than this are in view, they are
+            drawn as clusters sized by the number of wells in each.
+
+    Returns: plotly Figure.
+
+    """
+    if bounds is None:
+        visible = locations.located
+        x, y = locations.x[visible], locations.y[visible]
+        bounds = (x.min(), y.min(), x.max(), y.max()) if visible.size else (0, 0, 1, 1)
+    else:
+        visible = locations.within_bounds(*bounds)
+
+    x, y = locations.x[visible], locations.y[visible]
+    fig = go.Figure()
+    if visible.size > max_points:
+        cx, cy, counts = cluster_points(x, y, bounds, max_points)
+        fig.add_trace(
+            go.Scattergl(
+                x=cx,
+                y=cy,
+                mode="markers",
+                name="Wells",
+                text=[f"{c} wells" for c in counts],
+                hoverinfo="text",
+                marker=dict(size=4 + 2 * numpy.sqrt(counts), color="grey", opacity=0.6),
+            )
+        )
+    else:
+        fig.add_trace(
+            go.Scattergl(
+                x=x,
+                y=y,
+                mode="markers",
+                name="Wells",
+                text=locations.names[visible],
+                hoverinfo="text",
+                marker=dict(size=6, color="grey"),
+            )
+        )
+
+    if len(highlight):
+        idx = [locations.index_of(name) for name in highlight]
+        fig.add_trace(
+            go.Scatter(
+                x=locations.x[idx],
+                y=locations.y[idx],
+                mode="markers+text",
+                name="Selected",
+                text=list(highlight),
+                textposition="top center",
+                hoverinfo="text",
+                marker=dict(size=10, color="crimson"),
+            )
+        )
+
+    fig.update_xaxes(title_text="X")
+    fig.update_yaxes(title_text="Y", scaleanchor="x", scaleratio=1)
+    fig.update_layout(template="plotly_white", showlegend=False, uirevision="map")
+    return fig
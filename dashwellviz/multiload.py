@@ -1,5 +1,8 @@
 import os
 import glob
+from concurrent.futures import ProcessPoolExecutor
+
+import lasio
 import pandas as pd
 import numpy as np
 from welly import Project, Well
@@ -8,5 +11,40 @@ from welly import Project, Well
 def multiload(path):
     asps = []
     for root, dirs, files in os.walk(path):
-        asps += glob.glob(os.path.join(root, '*.las'))      
+        # LAS files are often named in upper case e.g. Poseidon1Decim.LAS
+        asps += glob.glob(os.path.join(root, '*.[lL][aA][sS]'))
     return asps
+
+
+def load_las(filename):
+    """Load a LAS file into a pandas.DataFrame indexed by depth."""
+    return lasio.read(filename).df()
+
+
+def map_wells(func, filenames, processes=None):
+    """Apply a function to LAS files in a pool of processes.
+
+    Each worker loads its LAS files itself, so only the results of *func*
+    are sent back to the calling process.
+
+    Args:
+        func (function): takes a filename and returns anything picklable,
+            e.g. ``load_las``. Must be defined at module level.
+        filenames (list): LAS filenames e.g. from ``multiload()``.
+        processes (int, optional): number of worker processes. Default is
+            the number of CPUs.
+
+    Returns: dict of filename to the result of *func*.
+
+    """
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return dict(zip(filenames, pool.map(func, filenames)))
+
+
+def multiload_dfs(path, processes=None):
+    """Load all LAS files under a folder in parallel.
+
+    Returns: dict of filename to pandas.DataFrame
+
+    """
+    return map_wells(load_las, multiload(path), processes=processes)
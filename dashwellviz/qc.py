@@ -0,0 +1,229 @@
+from functools import partial
+
+import numpy
+import pandas as pd
+import plotly.graph_objs as go
+
+# Bit flags, combined in a uint8 mask per sample and curve.
+NULL = 1
+SPIKE = 2
+OUT_OF_RANGE = 4
+DEPTH_GAP = 8
+DEPTH_STEP = 16
+
+FLAG_NAMES = {
+    NULL: "null",
+    SPIKE: "spike",
+    OUT_OF_RANGE: "out of range",
+    DEPTH_GAP: "depth gap",
+    DEPTH_STEP: "irregular depth step",
+}
+
+NULL_VALUES = (-999.25, -999.0, -9999.0)
+
+# Curves which vary over orders of magnitude; spikes are found in log10 space.
+RESISTIVITY_CURVES = (
+    "RS",
+    "RD",
+    "RT",
+    "ILD",
+    "LLD",
+    "LLS",
+    "ATRT",
+    "ATRX",
+    "P16H",
+    "P34H",
+    "DEEP",
+)
+
+# Plausible (min, max) values for common mnemonics.
+CURVE_RANGES = {}
+for _mnemonics, _range in (
+    (("GR", "ECGR", "GRD", "GRARC", "GAMM", "CGR", "SGR"), (0, 500)),
+    (("DT", "DTC", "DTCO"), (30, 250)),
+    (("DTS", "DTSM"), (50, 700)),
+    (("RHOB", "RHOZ", "HROM", "DENS", "DEN"), (1.0, 3.5)),
+    # Neutron porosity in either v/v or percent.
+    (("NPHI", "TNPH", "HTNP", "TNP", "NPOR"), (-15, 100)),
+    (("CALI", "CAL1", "HCAL", "HDAR", "DCAV", "BATC"), (2, 40)),
+    (("PEF", "PEFZ", "HPEF"), (0, 20)),
+    (RESISTIVITY_CURVES, (0.01, 1e5)),
+    (("SP",), (-500, 500)),
+):
+    CURVE_RANGES.update(dict.fromkeys(_mnemonics, _range))
+
+
+def describe_flags(flags):
+    """Names of the flags set in a mask value, e.g. ``"null, depth gap"``."""
+    return ", ".join(name for flag, name in FLAG_NAMES.items() if flags & flag)
+
+
+def depth_flags(depth, gap_factor=2.0, step_tolerance=0.1):
+    """Flag gaps and irregular steps in a depth index.
+
+    Args:
+        depth (array-like)
+        gap_factor (float): a step more than this many times the usual
+            (median) step is a gap.
+        step_tolerance (float): a step differing from the usual step by more
+            than this fraction of it is irregular. Steps which are not
+            increasing are always irregular.
+
+    Returns: numpy.ndarray (uint8) with ``DEPTH_GAP`` or ``DEPTH_STEP`` set on
+        the sample after each gap or irregular step.
+
+    """
+    depth = numpy.asarray(depth, dtype=float)
+    flags = numpy.zeros(depth.size, dtype=numpy.uint8)
+    if depth.size < 2:
+        return flags
+    step = numpy.diff(depth)
+    usual = numpy.median(step)
+    gap = step > gap_factor * usual
+    irregular = (numpy.abs(step - usual) > step_tolerance * abs(usual)) | (step <= 0)
+    flags[1:][gap] |= DEPTH_GAP
+    flags[1:][irregular & ~gap] |= DEPTH_STEP
+    return flags
+
+
+def qc_curves(
+    df,
+    ranges=None,
+    null_values=NULL_VALUES,
+    window=11,
+    threshold=6.0,
+    log_curves=RESISTIVITY_CURVES,
+    **depth_kwargs,
+):
+    """Flag nulls, spikes, out of range values and depth problems in a well.
+
+    Args:
+        df (pandas.DataFrame): the index should be the depth.
+        ranges (dict, optional): (min, max) for each column name, added to
+            ``CURVE_RANGES``. Columns with no range are not range checked.
+        null_values (tuple): sentinel values treated as null, in case they
+            have not already been converted to NaN.
+        window (int): number of samples in the rolling median used to find
+            spikes.
+        threshold (float): a sample is a spike if it differs from the rolling
+            median by more than this many times the curve's typical
+            deviation from it (median absolute deviation, or the mean
+            absolute deviation if that is 0).
+        log_curves (tuple): column names whose spikes are found from the
+            log10 of the values.
+
+    The whole well is checked at once, so the memory used is a few times
+    that of *df*; to check a field, call this once per well, as
+    ``qc_field()`` does.
+
+    Other keyword arguments are passed to ``depth_flags()``.
+
+    Returns: pandas.DataFrame (uint8) of flags with the same index and
+        columns as *df*. Depth gaps and steps are flagged in every column.
+
+    """
+    ranges = {**CURVE_RANGES, **(ranges or {})}
+    values = df.select_dtypes("number").astype(float)
+    data = values.to_numpy()
+
+    flags = numpy.zeros(data.shape, dtype=numpy.uint8)
+    null = numpy.isnan(data) | numpy.isin(data, null_values)
+    flags[null] |= NULL
+    data = numpy.where(null, numpy.nan, data)
+
+    # Rolling median of every curve at once; spikes stand out from it by
+    # much more than the curve's usual scatter.
+    is_log = numpy.isin(values.columns, log_curves)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        scaled = numpy.where(is_log, numpy.log10(data), data)
+    median = (
+        pd.DataFrame(scaled)
+        .rolling(window, center=True, min_periods=1)
+        .median()
+        .to_numpy()
+    )
+    deviation = numpy.abs(scaled - median)
+    with numpy.errstate(invalid="ignore"):
+        # Both scales estimate the standard deviation of normal scatter. The
+        # median absolute deviation is 0 for quantised curves where most
+        # samples equal the rolling median, so use the mean there instead.
+        scale = 1.4826 * numpy.nanmedian(deviation, axis=0)
+        mean_scale = 1.2533 * numpy.nanmean(deviation, axis=0)
+        scale = numpy.where(scale > 0, scale, mean_scale)
+        spike = deviation > threshold * scale
+    flags[spike] |= SPIKE
+
+    lower = numpy.array([ranges.get(c, (-numpy.inf, numpy.inf))[0] for c in values])
+    upper = numpy.array([ranges.get(c, (-numpy.inf, numpy.inf))[1] for c in values])
+    with numpy.errstate(invalid="ignore"):
+        flags[(data < lower) | (data > upper)] |= OUT_OF_RANGE
+
+    flags |= depth_flags(df.index, **depth_kwargs)[:, None]
+    return pd.DataFrame(flags, index=df.index, columns=values.columns)
+
+
+def qc_summary(flags):
+    """Count each kind of flag per curve.
+
+    Args:
+        flags (pandas.DataFrame): output of ``qc_curves()``.
+
+    Returns: pandas.DataFrame with one row per curve and one column per flag.
+
+    """
+    data = flags.to_numpy()
+    return pd.DataFrame(
+        {name: ((data & flag) > 0).sum(axis=0) for flag, name in FLAG_NAMES.items()},
+        index=flags.columns,
+    )
+
+
+def _qc_las(filename, **kwargs):
+    from dashwellviz.multiload import load_las
+
+    return qc_curves(load_las(filename), **kwargs)
+
+
+def qc_field(path, processes=None, **kwargs):
+    """QC every LAS file under a folder, in a pool of processes.
+
+    Args:
+        path (str): folder to search for LAS files, see ``multiload()``.
+        processes (int, optional): number of worker processes.
+
+    Other keyword arguments are passed to ``qc_curves()``.
+
+    Returns: dict of filename to flags DataFrame.
+
+    """
+    # Imported here so the rest of this module does not need welly/lasio.
+    from dashwellviz.multiload import map_wells, multiload
+
+    return map_wells(partial(_qc_las, **kwargs), multiload(path), processes=processes)
+
+
+def qc_track_trace(flags, columns=None):
+    """Make a heatmap trace showing QC flags, for a track of a composite log.
+
+    Args:
+        flags (pandas.DataFrame): output of ``qc_curves()``.
+        columns (list, optional): columns to show. Default is all.
+
+    Returns: plotly ``go.Heatmap`` with one column per curve. Flagged samples
+        are coloured; hovering shows which flags are set.
+
+    """
+    if columns is not None:
+        flags = flags[columns]
+    data = flags.to_numpy()
+    names = numpy.array([describe_flags(i) for i in range(32)], dtype=object)
+    return go.Heatmap(
+        z=numpy.where(data > 0, 1.0, numpy.nan),
+        x=list(flags.columns),
+        y=flags.index,
+        text=names[data & 31],
+        hoverinfo="x+y+text",
+        colorscale=[[0, "crimson"], [1, "crimson"]],
+        showscale=False,
+        name="QC",
+    )
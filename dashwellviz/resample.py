@@ -0,0 +1,278 @@
+import numpy
+import pandas as pd
+
+# Number of target depth samples processed at a time. Keeps the temporary
+# arrays bounded when resampling field-wide data.
+CHUNK_SIZE = 2 ** 20
+
+METHODS = ("nearest", "linear", "block", "mode")
+
+
+def depth_grid(start, stop, step):
+    """Make a regular depth grid.
+
+    Args:
+        start (float): first depth.
+        stop (float): last depth (included if it falls on the grid).
+        step (float): sample interval.
+
+    Returns: numpy.ndarray of depths.
+
+    """
+    n = int(numpy.floor((stop - start) / step + 1e-9)) + 1
+    return start + step * numpy.arange(max(n, 0))
+
+
+def infer_step(depth):
+    """Infer the sample interval of a depth array (median spacing)."""
+    depth = numpy.asarray(depth, dtype=float)
+    if depth.size < 2:
+        raise ValueError("Need at least two samples to infer a depth step")
+    return float(numpy.median(numpy.diff(depth)))
+
+
+def _chunks(n, chunk_size):
+    for start in range(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def _prepare(depth, values, categorical=False):
+    """Drop nulls and sort by depth."""
+    depth = numpy.asarray(depth, dtype=float)
+    if categorical:
+        codes, uniques = pd.factorize(numpy.asarray(values, dtype=object))
+        keep = (codes >= 0) & ~numpy.isnan(depth)
+        values = codes
+    else:
+        values = numpy.asarray(values, dtype=float)
+        keep = ~(numpy.isnan(depth) | numpy.isnan(values))
+        uniques = None
+    depth, values = depth[keep], values[keep]
+    if depth.size > 1 and numpy.any(numpy.diff(depth) < 0):
+        order = numpy.argsort(depth, kind="stable")
+        depth, values = depth[order], values[order]
+    return depth, values, uniques
+
+
+def _nearest(depth, values, target, tolerance):
+    idx = numpy.searchsorted(depth, target)
+    lo = numpy.clip(idx - 1, 0, depth.size - 1)
+    hi = numpy.clip(idx, 0, depth.size - 1)
+    use_hi = numpy.abs(depth[hi] - target) < numpy.abs(target - depth[lo])
+    nearest = numpy.where(use_hi, hi, lo)
+    out = values[nearest].astype(float)
+    if tolerance is not None:
+        out[numpy.abs(depth[nearest] - target) > tolerance] = numpy.nan
+    return out
+
+
+def _block_average(depth, cumulative, target, half_step):
+    start = numpy.searchsorted(depth, target - half_step, side="left")
+    stop = numpy.searchsorted(depth, target + half_step, side="left")
+    count = stop - start
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        out = (cumulative[stop] - cumulative[start]) / count
+    out[count == 0] = numpy.nan
+    return out
+
+
+def _block_mode(depth, codes, n_classes, target, half_step):
+    lower = target - half_step
+    s0 = numpy.searchsorted(depth, lower[0], side="left")
+    s1 = numpy.searchsorted(depth, target[-1] + half_step, side="left")
+    d, c = depth[s0:s1], codes[s0:s1]
+
+    # Assign each source sample to the block whose lower edge precedes it.
+    block = numpy.searchsorted(lower, d, side="right") - 1
+    keep = (block >= 0) & (d < target[block] + half_step)
+    block, c = block[keep], c[keep]
+
+    counts = numpy.bincount(
+        block * n_classes + c, minlength=target.size * n_classes
+    ).reshape(target.size, n_classes)
+    out = counts.argmax(axis=1)
+    return numpy.where(counts.sum(axis=1) > 0, out, -1)
+
+
+def resample_curve(
+    depth,
+    values,
+    target,
+    method="linear",
+    step=None,
+    tolerance=None,
+    chunk_size=CHUNK_SIZE,
+):
+    """Resample a single curve onto target depths.
+
+    Args:
+        depth (array-like): depths of the source samples.
+        values (array-like): source values. Null values are ignored.
+        target (array-like): depths to resample onto (sorted ascending).
+        method (str): one of:
+
+            - ``"nearest"``: value of the closest source sample.
+            - ``"linear"``: linear interpolation between source samples.
+            - ``"block"``: mean of the source samples within half a step
+              either side of each target depth.
+            - ``"mode"``: most common value within half a step either side
+              of each target depth; use this for categorical curves.
+
+        step (float, optional): target sample interval, used by the
+            ``"block"`` and ``"mode"`` methods. Inferred from *target* if
+            omitted.
+        tolerance (float, optional): for ``"nearest"`` and ``"linear"``,
+            target depths further than this from any source sample are set
+            to null. Default is no limit.
+        chunk_size (int): number of target depths processed at a time. For
+            ``"mode"`` this is divided by the number of categories.
+
+    Returns: numpy.ndarray the same length as *target*. Float for all
+        methods except ``"mode"``, which returns an object array holding
+        the original category values (``None`` where there was no data).
+
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, not '{method}'")
+    target = numpy.asarray(target, dtype=float)
+    categorical = method == "mode"
+    depth, values, uniques = _prepare(depth, values, categorical=categorical)
+
+    if categorical:
+        out = numpy.full(target.size, None, dtype=object)
+    else:
+        out = numpy.full(target.size, numpy.nan)
+    if depth.size == 0 or target.size == 0:
+        return out
+
+    if method in ("block", "mode"):
+        if step is None:
+            step = infer_step(target) if target.size > 1 else infer_step(depth)
+        half_step = step / 2
+    if method == "block":
+        cumulative = numpy.concatenate([[0.0], numpy.cumsum(values)])
+    if categorical:
+        # The mode keeps a count per target depth and class, so fewer
+        # target depths fit in a chunk.
+        chunk_size = max(chunk_size // max(uniques.size, 1), 1)
+
+    for chunk in _chunks(target.size, chunk_size):
+        t = target[chunk]
+        if method == "nearest":
+            out[chunk] = _nearest(depth, values, t, tolerance)
+        elif method == "linear":
+            res = numpy.interp(t, depth, values, left=numpy.nan, right=numpy.nan)
+            if tolerance is not None:
+                gap = numpy.abs(_nearest(depth, depth, t, None) - t)
+                res[gap > tolerance] = numpy.nan
+            out[chunk] = res
+        elif method == "block":
+            out[chunk] = _block_average(depth, cumulative, t, half_step)
+        else:
+            codes = _block_mode(depth, values, uniques.size, t, half_step)
+            res = numpy.full(t.size, None, dtype=object)
+            res[codes >= 0] = numpy.asarray(uniques, dtype=object)[codes[codes >= 0]]
+            out[chunk] = res
+    return out
+
+
+def resample_intervals(df, target, column="label"):
+    """Sample an interval table (e.g. lithology or stratigraphy) at depths.
+
+    Args:
+        df (pandas.DataFrame): should have columns "depth_from", "depth_to"
+            and *column*.
+        target (array-like): depths to sample at.
+        column (str): column holding the value for each interval.
+
+    Returns: numpy.ndarray (object) the same length as *target* containing
+        the value of the interval covering each depth, or ``None``.
+
+    """
+    df = df.sort_values("depth_from")
+    tops = df["depth_from"].to_numpy(dtype=float)
+    bases = df["depth_to"].to_numpy(dtype=float)
+    labels = df[column].to_numpy(dtype=object)
+    target = numpy.asarray(target, dtype=float)
+
+    idx = numpy.searchsorted(tops, target, side="right") - 1
+    inside = idx >= 0
+    inside[inside] = target[inside] < bases[idx[inside]]
+
+    out = numpy.full(target.size, None, dtype=object)
+    out[inside] = labels[idx[inside]]
+    return out
+
+
+def _default_method(series):
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(
+        series
+    ):
+        return "linear"
+    return "mode"
+
+
+def align_curves(
+    df, step=None, depth=None, methods=None, default_method=None, **kwargs
+):
+    """Resample all curves in a DataFrame onto a common depth grid.
+
+    Each column is resampled from its own non-null samples, so curves
+    sampled at different rates (e.g. logs and core) can share a track.
+
+    Args:
+        df (pandas.DataFrame): the index should be the depth.
+        step (float, optional): sample interval of the output grid. The grid
+            spans the full depth range of *df*. Ignored if *depth* is given.
+            If both are omitted, the median sample interval of *df* is used.
+        depth (array-like, optional): explicit target depths.
+        methods (dict, optional): resampling method for each column name, see
+            ``resample_curve()``.
+        default_method (str, optional): method for columns not in *methods*.
+            Default is ``"linear"`` for numeric columns and ``"mode"`` for
+            others.
+
+    Other keyword arguments are passed to ``resample_curve()``.
+
+    Returns: pandas.DataFrame indexed by the target depths.
+
+    """
+    if methods is None:
+        methods = {}
+    index = df.index.to_numpy(dtype=float)
+    if depth is None:
+        if step is None:
+            step = infer_step(index)
+        depth = depth_grid(numpy.nanmin(index), numpy.nanmax(index), step)
+    depth = numpy.asarray(depth, dtype=float)
+
+    data = {}
+    for column in df.columns:
+        method = methods.get(column, default_method) or _default_method(df[column])
+        data[column] = resample_curve(
+            index, df[column].to_numpy(), depth, method=method, step=step, **kwargs
+        )
+    return pd.DataFrame(data, index=pd.Index(depth, name=df.index.name))
+
+
+def align_wells(dfs, step, **kwargs):
+    """Resample several wells onto one common depth grid.
+
+    Args:
+        dfs (dict): well name to pandas.DataFrame (depth index).
+        step (float): sample interval of the common grid, which spans the
+            combined depth range of all wells.
+
+    Other keyword arguments are passed to ``align_curves()``.
+
+    Returns: dict of well name to resampled pandas.DataFrame.
+
+    """
+    top = min(numpy.nanmin(df.index.to_numpy(dtype=float)) for df in dfs.values())
+    base = max(numpy.nanmax(df.index.to_numpy(dtype=float)) for df in dfs.values())
+    # Snap the grid to a multiple of step so grids from separate calls line up.
+    depth = depth_grid(numpy.floor(top / step) * step, base, step)
+    return {
+        name: align_curves(df, step=step, depth=depth, **kwargs)
+        for name, df in dfs.items()
+    }
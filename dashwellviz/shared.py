@@ -0,0 +1,319 @@
+import atexit
+import fcntl
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy
+import pandas as pd
+
+# refcount, metadata length, last access time (seconds since the epoch)
+_HEADER = struct.Struct("<qqd")
+_ALIGN = 64
+
+
+def _open_segment(name, create=False, size=0):
+    """Open a shared memory segment not tied to this process's lifetime.
+
+    Before Python 3.13 every process that opens a segment registers it with
+    the resource tracker, which unlinks it when that process exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(
+            name=name, create=create, size=size, track=False
+        )
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _unlink(shm):
+    if sys.version_info < (3, 13):
+        # unlink() unregisters the segment, so it must be registered again.
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+@contextmanager
+def _file_lock(path):
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def file_version(*filenames):
+    """Version string for data loaded from files, from their mtimes and sizes.
+
+    For the *version* argument of ``SharedWellStore``, e.g.
+    ``lambda well_name: file_version(las_files[well_name])``. Missing
+    files are included as such, so creating one changes the version.
+    """
+    parts = []
+    for filename in filenames:
+        try:
+            stat = os.stat(filename)
+            parts.append(f"{filename}:{stat.st_mtime_ns}:{stat.st_size}")
+        except FileNotFoundError:
+            parts.append(f"{filename}:missing")
+    return "|".join(parts)
+
+
+def _code_version(func):
+    """Version string for a function from its compiled code."""
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return getattr(func, "__qualname__", type(func).__qualname__)
+    return _key(_code_repr(code))
+
+
+def _code_repr(code):
+    # Nested code objects (e.g. comprehensions) repr with their address.
+    consts = [
+        _code_repr(c) if hasattr(c, "co_code") else repr(c) for c in code.co_consts
+    ]
+    return repr((code.co_code, consts, code.co_names))
+
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # Someone still holds a DataFrame backed by the segment; the
+        # mapping is freed once they let go of it.
+        pass
+
+
+class SharedWellStore:
+    """Load each well once and share it read-only between processes.
+
+    Every process (e.g. each gunicorn worker) creates its own store with
+    the same *loader* and *prefix*. The first one to ask for a well loads it
+    into shared memory; the others attach to it. A reference count of the
+    attached processes is kept alongside the data, and wells which nobody
+    has attached for *max_idle* seconds are removed by ``evict_cold()``.
+
+    Segments are named from the well name and the version of its data, so
+    when the data or the loader changes, e.g. between runs of an app, the
+    well is loaded afresh rather than served from an old segment. Each
+    process releases its wells when it exits, and the last process to
+    release a well removes it. Within a process the store is guarded by a
+    lock, so it can be shared by the threads of a threaded server.
+
+    Args:
+        loader (callable): takes a well name and returns a pandas.DataFrame
+            with the depth as index. All columns must be numeric; they are
+            stored as float64.
+        prefix (str): prefix for the shared memory segment names, so that
+            separate apps on one machine do not collide.
+        max_idle (float): seconds after which an unused well is released by
+            this process and, once no process is attached, removed.
+        lock_dir (str, optional): directory for the lock files. Default is
+            the system temporary directory.
+        version (callable, optional): takes a well name and returns a string
+            which changes whenever the well's data does, e.g. using
+            ``file_version()``. It is called on every ``get()``, so it
+            should be cheap. Default is a version of the loader's code only.
+
+    Processes that are killed (e.g. ``SIGKILL``) without calling
+    ``close()`` leave their reference behind, so that version of the well
+    will not be removed until the machine's shared memory is cleared.
+    Locking uses ``fcntl``, so this is not available on Windows.
+
+    """
+
+    def __init__(self, loader, prefix="dwv", max_idle=600, lock_dir=None, version=None):
+        self.loader = loader
+        self.prefix = prefix
+        self.max_idle = max_idle
+        self.lock_dir = lock_dir or tempfile.gettempdir()
+        self.version = version
+        self._loader_version = _code_version(loader)
+        # well name to (segment name, shm, DataFrame, last used)
+        self._attached = {}
+        # segment name to well name, for every segment this process has
+        # created or attached to
+        self._seen = {}
+        # Reentrant, as get() may release an old version of a well. The
+        # file locks only exclude other processes.
+        self._thread_lock = threading.RLock()
+        atexit.register(self.close)
+
+    def _segment_name(self, well_name):
+        parts = [well_name, self._loader_version]
+        if self.version is not None:
+            parts.append(str(self.version(well_name)))
+        return f"{self.prefix}_{_key(chr(0).join(parts))}"
+
+    def _lock(self, segment_name):
+        return _file_lock(os.path.join(self.lock_dir, f"{segment_name}.lock"))
+
+    def _create(self, well_name, segment_name):
+        df = self.loader(well_name)
+        data = numpy.column_stack(
+            [df.index.to_numpy(dtype=float), df.to_numpy(dtype=float)]
+        )
+        meta = json.dumps(
+            {
+                "columns": [str(c) for c in df.columns],
+                "index_name": df.index.name,
+                "shape": data.shape,
+            }
+        ).encode("utf-8")
+        offset = -(-(_HEADER.size + len(meta)) // _ALIGN) * _ALIGN
+
+        shm = _open_segment(segment_name, create=True, size=offset + data.nbytes)
+        shm.buf[_HEADER.size : _HEADER.size + len(meta)] = meta
+        numpy.ndarray(data.shape, dtype=float, buffer=shm.buf, offset=offset)[:] = data
+        _HEADER.pack_into(shm.buf, 0, 1, len(meta), time.time())
+        return shm
+
+    def _attach(self, segment_name):
+        shm = _open_segment(segment_name)
+        refcount, meta_len, _ = _HEADER.unpack_from(shm.buf)
+        _HEADER.pack_into(shm.buf, 0, refcount + 1, meta_len, time.time())
+        return shm
+
+    def _view(self, shm):
+        _, meta_len, _ = _HEADER.unpack_from(shm.buf)
+        meta = json.loads(bytes(shm.buf[_HEADER.size : _HEADER.size + meta_len]))
+        offset = -(-(_HEADER.size + meta_len) // _ALIGN) * _ALIGN
+        data = numpy.ndarray(
+            tuple(meta["shape"]), dtype=float, buffer=shm.buf, offset=offset
+        )
+        data.flags.writeable = False
+        return pd.DataFrame(
+            data[:, 1:],
+            index=pd.Index(data[:, 0], name=meta["index_name"]),
+            columns=meta["columns"],
+            copy=False,
+        )
+
+    def get(self, well_name):
+        """Get a well's data, loading it into shared memory if needed.
+
+        If the version of the well has changed since this process attached
+        to it, the old version is released and the new one loaded.
+
+        Args:
+            well_name (str)
+
+        Returns: read-only pandas.DataFrame backed by shared memory. Make a
+            copy (``df.copy()``) before modifying it.
+
+        """
+        with self._thread_lock:
+            now = time.time()
+            segment_name = self._segment_name(well_name)
+            if well_name in self._attached:
+                attached_name, shm, df, _ = self._attached[well_name]
+                if attached_name == segment_name:
+                    with self._lock(segment_name):
+                        refcount, meta_len, _ = _HEADER.unpack_from(shm.buf)
+                        _HEADER.pack_into(shm.buf, 0, refcount, meta_len, now)
+                    self._attached[well_name] = (segment_name, shm, df, now)
+                    return df
+                self.release(well_name)
+
+            with self._lock(segment_name):
+                try:
+                    shm = self._attach(segment_name)
+                except FileNotFoundError:
+                    shm = self._create(well_name, segment_name)
+            df = self._view(shm)
+            self._attached[well_name] = (segment_name, shm, df, now)
+            self._seen[segment_name] = well_name
+            return df
+
+    def release(self, well_name, remove=False):
+        """Detach this process from a well.
+
+        DataFrames previously returned by ``get()`` for this well should
+        not be used afterwards.
+
+        Args:
+            well_name (str)
+            remove (bool): also remove the well from shared memory if no
+                other process is attached to it.
+
+        """
+        with self._thread_lock:
+            segment_name, shm, _, _ = self._attached.pop(well_name)
+            with self._lock(segment_name):
+                refcount, meta_len, last_access = _HEADER.unpack_from(shm.buf)
+                refcount = max(refcount - 1, 0)
+                _HEADER.pack_into(shm.buf, 0, refcount, meta_len, last_access)
+                if remove and refcount == 0:
+                    _unlink(shm)
+                    self._seen.pop(segment_name, None)
+            _close(shm)
+
+    def refcount(self, well_name):
+        """Number of processes attached to the current version of a well.
+
+        Returns 0 if it is not loaded.
+        """
+        try:
+            shm = _open_segment(self._segment_name(well_name))
+        except FileNotFoundError:
+            return 0
+        refcount, _, _ = _HEADER.unpack_from(shm.buf)
+        _close(shm)
+        return refcount
+
+    def evict_cold(self):
+        """Release and remove wells which have not been used recently.
+
+        Wells this process has not used for *max_idle* seconds are released,
+        and any well it knows of which no process is attached to and which
+        has not been used by anyone for *max_idle* seconds is removed from
+        shared memory. Old versions of wells are treated the same way. Call
+        this periodically, e.g. from a Dash callback.
+
+        Returns: list of the well names removed from shared memory.
+
+        """
+        with self._thread_lock:
+            now = time.time()
+            for well_name, (_, _, _, last_used) in list(self._attached.items()):
+                if now - last_used > self.max_idle:
+                    self.release(well_name)
+
+            attached = {segment_name for segment_name, *_ in self._attached.values()}
+            evicted = []
+            for segment_name in list(set(self._seen) - attached):
+                with self._lock(segment_name):
+                    try:
+                        shm = _open_segment(segment_name)
+                    except FileNotFoundError:
+                        self._seen.pop(segment_name, None)
+                        continue
+                    refcount, _, last_access = _HEADER.unpack_from(shm.buf)
+                    if refcount == 0 and now - last_access > self.max_idle:
+                        _unlink(shm)
+                        evicted.append(self._seen.pop(segment_name))
+                    _close(shm)
+            return evicted
+
+    def close(self):
+        """Release every well attached by this process.
+
+        Wells no other process is attached to are removed from shared
+        memory. This is called automatically when the process exits.
+        """
+        with self._thread_lock:
+            for well_name in list(self._attached):
+                self.release(well_name, remove=True)
@@ -0,0 +1,436 @@
+import numpy
+import plotly.graph_objs as go
+
+from dashwellviz.qc import CURVE_RANGES, RESISTIVITY_CURVES
+from dashwellviz.resample import resample_intervals
+
+# Number of fixed histogram bins kept in each summary of a curve with a
+# known range.
+HISTOGRAM_BINS = 1000
+
+# Curves with no known range are binned on one grid shared by every curve:
+# logarithmic bins (100 per decade, so about 2.3% wide) from 1e-3 to 1e7
+# either side of zero, and a single bin from -1e-3 to 1e-3.
+_GENERIC_DECADES = (-3, 7)
+_GENERIC_BINS_PER_DECADE = 100
+
+
+def _add_counts(keys, counts, new_keys, new_counts):
+    """Merge two sparse (key, count) arrays."""
+    keys = numpy.concatenate([keys, new_keys])
+    counts = numpy.concatenate([counts, new_counts])
+    merged, inverse = numpy.unique(keys, return_inverse=True)
+    return merged, numpy.bincount(inverse, weights=counts).astype(int)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with fixed logarithmic buckets.
+
+    Values are counted in buckets whose edges grow geometrically, so any
+    quantile can be recovered within *relative_accuracy* of the true value
+    (the DDSketch approach). Because the buckets are the same for every
+    sketch with the same accuracy, sketches from different wells or
+    formations can be merged exactly, and the bucket counts double as a
+    fine histogram.
+
+    Args:
+        relative_accuracy (float)
+        min_value (float): values closer to zero than this are counted as zero.
+
+    """
+
+    def __init__(self, relative_accuracy=0.005, min_value=1e-6):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = numpy.log(self.gamma)
+        self.zero_count = 0
+        self.positive = (numpy.array([], dtype=int), numpy.array([], dtype=int))
+        self.negative = (numpy.array([], dtype=int), numpy.array([], dtype=int))
+
+    @property
+    def count(self):
+        return int(self.zero_count + self.positive[1].sum() + self.negative[1].sum())
+
+    def _key(self, values):
+        return numpy.ceil(numpy.log(values) / self._log_gamma).astype(int)
+
+    def _value(self, keys):
+        return 2 * self.gamma**keys / (self.gamma + 1)
+
+    def add(self, values):
+        """Add an array of values; nulls are ignored."""
+        values = numpy.asarray(values, dtype=float)
+        values = values[numpy.isfinite(values)]
+        for attr, selected in (
+            ("positive", values[values >= self.min_value]),
+            ("negative", -values[values <= -self.min_value]),
+        ):
+            keys, counts = numpy.unique(self._key(selected), return_counts=True)
+            setattr(self, attr, _add_counts(*getattr(self, attr), keys, counts))
+        self.zero_count += int((numpy.abs(values) < self.min_value).sum())
+
+    def merge(self, other):
+        """Add the counts of another sketch with the same accuracy to this one."""
+        if other.gamma != self.gamma or other.min_value != self.min_value:
+            raise ValueError("Can only merge sketches with the same accuracy")
+        self.positive = _add_counts(*self.positive, *other.positive)
+        self.negative = _add_counts(*self.negative, *other.negative)
+        self.zero_count += other.zero_count
+
+    def copy(self):
+        sketch = QuantileSketch(self.relative_accuracy, self.min_value)
+        sketch.merge(self)
+        return sketch
+
+    def buckets(self):
+        """Representative value and count of every non-empty bucket, ascending.
+
+        Returns: tuple of numpy.ndarray (values, counts)
+
+        """
+        neg_keys, neg_counts = self.negative
+        pos_keys, pos_counts = self.positive
+        values = numpy.concatenate(
+            [-self._value(neg_keys[::-1]), [0.0], self._value(pos_keys)]
+        )
+        counts = numpy.concatenate([neg_counts[::-1], [self.zero_count], pos_counts])
+        keep = counts > 0
+        return values[keep], counts[keep]
+
+    def quantile(self, q):
+        """Estimate quantile(s), e.g. ``sketch.quantile([0.1, 0.5, 0.9])``."""
+        values, counts = self.buckets()
+        q = numpy.asarray(q, dtype=float)
+        if values.size == 0:
+            return numpy.full(q.shape, numpy.nan)
+        rank = q * (counts.sum() - 1)
+        idx = numpy.searchsorted(numpy.cumsum(counts), rank, side="right")
+        return values[numpy.minimum(idx, values.size - 1)]
+
+
+def _generic_edges():
+    lo, hi = _GENERIC_DECADES
+    positive = numpy.logspace(lo, hi, (hi - lo) * _GENERIC_BINS_PER_DECADE + 1)
+    return numpy.concatenate([-positive[::-1], positive])
+
+
+def histogram_edges(curve=None, ranges=None, bins=HISTOGRAM_BINS):
+    """Fixed histogram bin edges for a curve.
+
+    The edges depend only on the curve name, never on the samples, so
+    summaries of the same curve from different wells can always be merged.
+    Where the range of the curve is known (from *ranges* or
+    ``dashwellviz.qc.CURVE_RANGES``) it is split into *bins* bins,
+    logarithmically spaced for resistivity curves. Otherwise a generic grid
+    of logarithmic bins about 2.3% of the value wide is used, covering
+    magnitudes from 1e-3 to 1e7 on both sides of zero.
+
+    Args:
+        curve (str, optional): curve name.
+        ranges (dict, optional): (min, max) for each curve name, added to
+            ``CURVE_RANGES``.
+        bins (int): number of bins for a curve with a known range.
+
+    Returns: numpy.ndarray of edges.
+
+    """
+    ranges = {**CURVE_RANGES, **(ranges or {})}
+    if curve in ranges:
+        lo, hi = ranges[curve]
+        if curve in RESISTIVITY_CURVES and lo > 0:
+            return numpy.geomspace(lo, hi, bins + 1)
+        return numpy.linspace(lo, hi, bins + 1)
+    return _generic_edges()
+
+
+class CurveSummary:
+    """Compact summary of the samples of one curve.
+
+    Summaries are computed once from the raw samples and can then be merged
+    (e.g. across wells or formations) without going back to the samples.
+
+    Args:
+        relative_accuracy (float): accuracy of the quantile sketch.
+        edges (array-like, optional): fixed histogram bin edges, see
+            ``histogram_edges()``. Default is the generic grid used for
+            curves with no known range.
+
+    Attributes:
+        count (int): number of non-null samples.
+        null_count (int)
+        total (float): sum of the samples.
+        total_sq (float): sum of the squared samples.
+        min (float)
+        max (float)
+        sketch (QuantileSketch)
+        edges (numpy.ndarray): fixed histogram bin edges.
+        counts (numpy.ndarray): number of samples in each fixed bin.
+        below (int): number of samples below the first edge.
+        above (int): number of samples above the last edge.
+
+    """
+
+    def __init__(self, relative_accuracy=0.005, edges=None):
+        self.count = 0
+        self.null_count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = numpy.inf
+        self.max = -numpy.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+        self._set_edges(edges)
+
+    def _set_edges(self, edges):
+        self.edges = None if edges is None else numpy.asarray(edges, dtype=float)
+        n_bins = 0 if edges is None else self.edges.size - 1
+        self.counts = numpy.zeros(n_bins, dtype=int)
+        self.below = 0
+        self.above = 0
+
+    @classmethod
+    def from_values(cls, values, **kwargs):
+        """Summarize an array of samples.
+
+        Keyword arguments are passed to ``CurveSummary()``.
+        """
+        summary = cls(**kwargs)
+        summary.add(values)
+        return summary
+
+    def add(self, values):
+        """Add an array of samples; nulls are counted but otherwise ignored."""
+        values = numpy.asarray(values, dtype=float)
+        valid = values[numpy.isfinite(values)]
+        self.null_count += values.size - valid.size
+        if valid.size:
+            self.count += valid.size
+            self.total += valid.sum()
+            self.total_sq += (valid**2).sum()
+            self.min = min(self.min, valid.min())
+            self.max = max(self.max, valid.max())
+            self.sketch.add(valid)
+
+            if self.edges is None:
+                self._set_edges(histogram_edges())
+            n_bins = self.counts.size
+            idx = numpy.searchsorted(self.edges, valid, side="right") - 1
+            # The last bin includes its upper edge.
+            idx[valid == self.edges[-1]] = n_bins - 1
+            inside = (idx >= 0) & (idx < n_bins)
+            self.below += int((idx < 0).sum())
+            self.above += int((idx >= n_bins).sum())
+            self.counts += numpy.bincount(idx[inside], minlength=n_bins)
+
+    def merge(self, other):
+        """Add another summary to this one.
+
+        Both summaries must have the same histogram edges, e.g. from
+        ``histogram_edges()`` for the same curve.
+        """
+        if other.edges is not None:
+            if self.edges is None:
+                self._set_edges(other.edges)
+            elif not numpy.array_equal(self.edges, other.edges):
+                raise ValueError(
+                    "Can only merge summaries with the same histogram edges"
+                )
+            self.counts += other.counts
+            self.below += other.below
+            self.above += other.above
+        self.count += other.count
+        self.null_count += other.null_count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else numpy.nan
+
+    @property
+    def std(self):
+        if not self.count:
+            return numpy.nan
+        return numpy.sqrt(max(self.total_sq / self.count - self.mean**2, 0))
+
+    def quantile(self, q):
+        """Estimate quantile(s), within the sketch's relative accuracy."""
+        return self.sketch.quantile(q)
+
+    def histogram(self, bins=50, range=None):
+        """Histogram of the summarized samples, from the fixed bins.
+
+        Adjacent fixed bins are added together so that there are at most
+        *bins* bins, so the counts are exact but the edges are always fixed
+        bin edges.
+
+        Args:
+            bins (int): maximum number of bins.
+            range (tuple, optional): (min, max) to show, widened to the
+                nearest fixed bin edges. Default is the range of the samples.
+
+        Returns: tuple of numpy.ndarray (counts, edges)
+
+        """
+        if self.edges is None or (range is None and not self.count):
+            return numpy.zeros(0, dtype=int), numpy.array([])
+        lo, hi = range if range is not None else (self.min, self.max)
+        n_bins = self.counts.size
+        start = min(max(numpy.searchsorted(self.edges, lo, "right") - 1, 0), n_bins - 1)
+        stop = min(max(numpy.searchsorted(self.edges, hi, "left"), start + 1), n_bins)
+
+        counts = self.counts[start:stop]
+        factor = -(-counts.size // bins)
+        n_groups = -(-counts.size // factor)
+        groups = numpy.arange(counts.size) // factor
+        edge_idx = start + numpy.minimum(
+            numpy.arange(n_groups + 1) * factor, counts.size
+        )
+        return numpy.bincount(groups, weights=counts).astype(int), self.edges[edge_idx]
+
+
+def merge_summaries(summaries):
+    """Merge summaries into a new one.
+
+    Args:
+        summaries (iterable of CurveSummary)
+
+    Returns: CurveSummary
+
+    """
+    merged = None
+    for summary in summaries:
+        if merged is None:
+            merged = CurveSummary(summary.sketch.relative_accuracy, summary.edges)
+        merged.merge(summary)
+    return merged
+
+
+def summarize_well(
+    df,
+    intervals=None,
+    column="label",
+    curves=None,
+    ranges=None,
+    bins=HISTOGRAM_BINS,
+    **kwargs,
+):
+    """Summarize every curve of a well, optionally per interval (e.g. formation).
+
+    Args:
+        df (pandas.DataFrame): the index should be the depth.
+        intervals (pandas.DataFrame, optional): interval table with columns
+            "depth_from", "depth_to" and *column*, see ``draw_strat()``.
+        column (str): column of *intervals* holding the interval name.
+        curves (list, optional): columns to summarize. Default is all
+            numeric columns.
+        ranges (dict, optional): (min, max) of the histogram bins for each
+            curve name, see ``histogram_edges()``. Use the same ranges for
+            every well whose summaries are to be combined.
+        bins (int): number of fixed histogram bins for a curve with a
+            known range.
+
+    Other keyword arguments are passed to ``CurveSummary()``.
+
+    Returns: dict with keys ``(curve, interval name)`` and ``CurveSummary``
+        values. The summary of the whole well has an interval name of None.
+
+    """
+    if curves is None:
+        curves = list(df.select_dtypes("number").columns)
+    depth = df.index.to_numpy(dtype=float)
+
+    zones = {}
+    if intervals is not None:
+        labels = resample_intervals(intervals, depth, column=column)
+        for label in intervals[column].unique():
+            zones[label] = labels == label
+
+    summaries = {}
+    for curve in curves:
+        values = df[curve].to_numpy(dtype=float)
+        edges = histogram_edges(curve, ranges=ranges, bins=bins)
+        summaries[(curve, None)] = CurveSummary.from_values(
+            values, edges=edges, **kwargs
+        )
+        for label, mask in zones.items():
+            summaries[(curve, label)] = CurveSummary.from_values(
+                values[mask], edges=edges, **kwargs
+            )
+    return summaries
+
+
+def combine_summaries(summaries, curve, interval=None, wells=None):
+    """Combine per-well summaries, e.g. for a field-wide formation histogram.
+
+    Args:
+        summaries (dict): well name to the output of ``summarize_well()``.
+        curve (str)
+        interval (str, optional): interval name; None for the whole wells.
+        wells (list, optional): wells to include. Default is all.
+
+    Returns: CurveSummary, or None if no well has the curve and interval.
+
+    """
+    if wells is None:
+        wells = list(summaries)
+    return merge_summaries(
+        summaries[well][(curve, interval)]
+        for well in wells
+        if (curve, interval) in summaries[well]
+    )
+
+
+def make_histogram(summary, bins=50, range=None, name=None, **kwargs):
+    """Make a histogram figure from a ``CurveSummary``.
+
+    Args:
+        summary (CurveSummary)
+        bins (int): maximum number of bins, see ``CurveSummary.histogram()``.
+        range (tuple, optional): (min, max) of the bins.
+        name (str, optional): curve name for the axis title. Resistivity
+            curves are drawn on a log axis.
+
+    Other keyword arguments are passed to ``go.Bar``, or ``go.Scatter`` for
+    a log axis.
+
+    Returns: plotly Figure.
+
+    """
+    counts, edges = summary.histogram(bins=bins, range=range)
+    if name in RESISTIVITY_CURVES:
+        # Bars do not size well on a log axis, so draw the bins as steps.
+        trace = go.Scatter(
+            x=edges,
+            y=numpy.append(counts, counts[-1:]),
+            line_shape="hv",
+            fill="tozeroy",
+            mode="lines",
+            name=name,
+            **kwargs,
+        )
+    else:
+        trace = go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=numpy.diff(edges),
+            name=name,
+            **kwargs,
+        )
+    fig = go.Figure(data=trace)
+    p10, p50, p90 = summary.quantile([0.1, 0.5, 0.9])
+    fig.update_xaxes(
+        title_text=name, type="log" if name in RESISTIVITY_CURVES else None
+    )
+    fig.update_yaxes(title_text="Count")
+    fig.update_layout(
+        template="plotly_white",
+        title_text=(
+            f"{name or ''} n={summary.count} nulls={summary.null_count} "
+            f"mean={summary.mean:.4g} P10={p10:.4g} P50={p50:.4g} P90={p90:.4g}"
+        ),
+    )
+    return fig
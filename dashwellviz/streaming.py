@@ -0,0 +1,325 @@
+import io
+import os
+import threading
+import time
+
+import numpy
+import pandas as pd
+import plotly.graph_objs as go
+
+from dashwellviz.figures import WellLog
+
+
+class RingBuffer:
+    """Fixed-size buffer of rows which overwrites the oldest rows when full.
+
+    Args:
+        capacity (int): maximum number of rows kept.
+        width (int): number of columns in each row.
+
+    Attributes:
+        count (int): total number of rows ever appended.
+
+    """
+
+    def __init__(self, capacity, width=1):
+        self.capacity = capacity
+        self._data = numpy.full((capacity, width), numpy.nan)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, rows):
+        """Append rows, an array of shape (n, width)."""
+        rows = numpy.asarray(rows, dtype=float).reshape(-1, self._data.shape[1])
+        n = rows.shape[0]
+        if n > self.capacity:
+            rows = rows[-self.capacity :]
+        positions = (self.count + n - rows.shape[0] + numpy.arange(rows.shape[0])) % (
+            self.capacity
+        )
+        self._data[positions] = rows
+        self.count += n
+
+    def to_array(self):
+        """Copy of the buffered rows, oldest first."""
+        if self.count <= self.capacity:
+            return self._data[: self.count].copy()
+        start = self.count % self.capacity
+        return numpy.concatenate([self._data[start:], self._data[:start]])
+
+
+class _TailingSource:
+    """Read the complete lines added to a growing text file since last read."""
+
+    def __init__(self, filename, encoding="utf-8"):
+        self.filename = filename
+        self.encoding = encoding
+        self._offset = 0
+        self._partial = b""
+
+    def _read_lines(self):
+        if not os.path.exists(self.filename):
+            return []
+        with open(self.filename, "rb") as f:
+            f.seek(self._offset)
+            data = self._partial + f.read()
+            self._offset = f.tell()
+        lines = data.split(b"\n")
+        # The last line may still be being written.
+        self._partial = lines.pop()
+        return [
+            line.decode(self.encoding, errors="replace").rstrip("\r") for line in lines
+        ]
+
+
+class TailingCSVSource(_TailingSource):
+    """Read samples appended to a CSV file as it is written.
+
+    Args:
+        filename (str): CSV file with a header row of curve names.
+
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.columns = None
+
+    def read(self):
+        """Read the new samples.
+
+        Returns: pandas.DataFrame with one column per curve in the file.
+
+        """
+        lines = [line for line in self._read_lines() if line.strip()]
+        if self.columns is None and lines:
+            self.columns = [c.strip() for c in lines.pop(0).split(",")]
+        if not lines:
+            return pd.DataFrame(columns=self.columns or [], dtype=float)
+        return pd.read_csv(
+            io.StringIO("\n".join(lines)), header=None, names=self.columns
+        )
+
+
+class TailingLASSource(_TailingSource):
+    """Read samples appended to the ~A section of an LAS file as it is written.
+
+    The curve mnemonics are read from the ~C section and the null value from
+    the NULL line of the ~W section. Wrapped LAS files are not supported.
+
+    Args:
+        filename (str)
+
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.columns = []
+        self.null_value = None
+        self._section = None
+
+    def read(self):
+        """Read the new samples.
+
+        Returns: pandas.DataFrame with one column per curve in the file.
+
+        """
+        data_lines = []
+        for line in self._read_lines():
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if stripped.startswith("~"):
+                self._section = stripped[1].upper()
+            elif self._section == "A":
+                data_lines.append(stripped)
+            elif self._section == "C":
+                self.columns.append(stripped.split(".", 1)[0].strip())
+            elif self._section == "W" and stripped.upper().startswith("NULL"):
+                value = stripped.split(".", 1)[1].rsplit(":", 1)[0]
+                self.null_value = float(value.split()[-1])
+
+        if not data_lines:
+            return pd.DataFrame(columns=self.columns, dtype=float)
+        df = pd.read_csv(
+            io.StringIO("\n".join(data_lines)),
+            sep=r"\s+",
+            header=None,
+            names=self.columns,
+        )
+        if self.null_value is not None:
+            df = df.replace(self.null_value, numpy.nan)
+        return df
+
+
+class SimulatedSource:
+    """Stand-in for a real-time feed (e.g. a WITSML server) while drilling.
+
+    Each call to ``read()`` returns the samples that would have arrived at
+    *rate* samples per second since the previous call, as random walks.
+
+    Args:
+        curves (list): curve names, not including the depth.
+        rate (float): samples per second.
+        step (float): depth increment between samples.
+        start_depth (float)
+        depth_name (str): name of the depth column.
+
+    """
+
+    def __init__(self, curves, rate=100, step=0.1, start_depth=0, depth_name="DEPT"):
+        self.columns = [depth_name] + list(curves)
+        self.rate = rate
+        self.step = step
+        self._depth = start_depth
+        self._values = numpy.zeros(len(curves))
+        self._last_read = time.time()
+        self._rng = numpy.random.default_rng()
+
+    def read(self):
+        now = time.time()
+        n = int((now - self._last_read) * self.rate)
+        if n == 0:
+            return pd.DataFrame(columns=self.columns, dtype=float)
+        self._last_read += n / self.rate
+
+        depth = self._depth + self.step * numpy.arange(1, n + 1)
+        values = self._values + numpy.cumsum(
+            self._rng.normal(size=(n, self._values.size)), axis=0
+        )
+        self._depth, self._values = depth[-1], values[-1]
+        return pd.DataFrame(numpy.column_stack([depth, values]), columns=self.columns)
+
+
+class LiveLog:
+    """Keep the latest samples of a live well log for a Dash viewer.
+
+    New samples are read from *source* into a ring buffer per curve, so the
+    memory used stays constant however long the log runs. Each sample read
+    is numbered; a viewer keeps the number of the last sample it has drawn
+    and asks for the ones after it, which are sent as a Dash ``extendData``
+    update so the figure is never rebuilt.
+
+    Polling and reading the buffers are guarded by a lock, so one LiveLog
+    can serve the callbacks of every open viewer on a threaded server.
+
+    Args:
+        source: object with a ``read()`` method returning a pandas.DataFrame
+            of new samples, e.g. ``TailingLASSource``, ``TailingCSVSource``
+            or ``SimulatedSource``.
+        curves (list): names of the curves to show, one per track.
+        depth (str, optional): name of the depth column. Default is the
+            first column of the samples.
+        max_points (int): number of samples kept and drawn for each curve.
+
+    Example::
+
+        @app.callback(
+            [Output("live-log", "extendData"), Output("live-log-sample", "data")],
+            [Input("interval", "n_intervals")],
+            [State("live-log-sample", "data")],
+        )
+        def update_live_log(n_intervals, sample_no):
+            update, sample_no = live_log.extend_data(since=sample_no)
+            if update is None:
+                raise PreventUpdate
+            return update, sample_no
+
+    """
+
+    def __init__(self, source, curves, depth=None, max_points=5000):
+        self.source = source
+        self.curves = list(curves)
+        self.depth = depth
+        self.max_points = max_points
+        # Each row is (sample number, depth, value).
+        self.buffers = {curve: RingBuffer(max_points, width=3) for curve in curves}
+        self.sample_count = 0
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Read new samples from the source into the buffers.
+
+        Returns: number of new samples.
+
+        """
+        with self._lock:
+            df = self.source.read()
+            if df.empty:
+                return 0
+            depth_col = self.depth or df.columns[0]
+            n = len(df)
+            sample_no = self.sample_count + 1 + numpy.arange(n)
+            depth = df[depth_col].to_numpy(dtype=float)
+            for curve, buffer in self.buffers.items():
+                if curve not in df:
+                    continue
+                values = df[curve].to_numpy(dtype=float)
+                keep = ~numpy.isnan(values)
+                buffer.append(numpy.column_stack([sample_no, depth, values])[keep])
+            self.sample_count += n
+            return n
+
+    def _since(self, since):
+        """Rows after sample *since* for each curve, and the latest sample."""
+        with self._lock:
+            arrays = []
+            for buffer in self.buffers.values():
+                rows = buffer.to_array()
+                arrays.append(
+                    rows[numpy.searchsorted(rows[:, 0], since, side="right") :]
+                )
+            return arrays, self.sample_count
+
+    def extend_data(self, since=0):
+        """Poll the source and get the samples a viewer has not drawn yet.
+
+        Args:
+            since (int): number of the last sample the viewer has drawn,
+                i.e. the sample number returned by the previous call.
+
+        Returns: tuple of the value for the ``extendData`` property of a
+            ``dcc.Graph`` built with ``make_figure()`` (None if there is
+            nothing new), and the number of the latest sample.
+
+        """
+        self.poll()
+        since = since or 0
+        arrays, sample_count = self._since(since)
+        if since >= sample_count:
+            return None, sample_count
+        update = (
+            {"x": [a[:, 2] for a in arrays], "y": [a[:, 1] for a in arrays]},
+            list(range(len(arrays))),
+            self.max_points,
+        )
+        return update, sample_count
+
+    def make_figure(self, **kwargs):
+        """Make the log figure with the currently buffered samples.
+
+        Keyword arguments are passed to ``WellLog()``.
+
+        Returns: tuple of plotly Figure and the number of the latest sample,
+            to pass as *since* to ``extend_data()``.
+
+        """
+        self.poll()
+        arrays, sample_count = self._since(0)
+        log = WellLog(n_tracks=len(self.curves), **kwargs)
+        log.update_track_titles({i: curve for i, curve in enumerate(self.curves)})
+        for i, (curve, rows) in enumerate(zip(self.curves, arrays)):
+            log.add_trace(
+                go.Scattergl(
+                    x=rows[:, 2],
+                    y=rows[:, 1],
+                    name=curve,
+                    mode="lines",
+                    line={"width": 1},
+                ),
+                track_no=i,
+            )
+        log.fig.update_yaxes(autorange="reversed")
+        log.fig.update_layout(template="plotly_white", uirevision="live-log")
+        return log.fig, sample_count
@@ -0,0 +1,386 @@
+import numpy
+import plotly.graph_objs as go
+import seaborn as sns
+
+from dashwellviz.crossover import crossover_polygons
+from dashwellviz.figures import AxisAllocator, WellLog
+from dashwellviz.resample import resample_intervals
+from dashwellviz.utils import to_plotly_rgb
+
+
+def _curve_spec(curve, track):
+    if isinstance(curve, str):
+        curve = {"name": curve}
+    curve = dict(curve)
+    curve.setdefault("log", track.get("log", False))
+    return curve
+
+
+def _fill_specs(track):
+    fills = track.get("fill", [])
+    if isinstance(fills, dict):
+        fills = [fills]
+    return [dict(fill) for fill in fills]
+
+
+def _axis_props(curve):
+    """Layout properties for the x axis of a curve."""
+    props = {}
+    if curve["log"]:
+        props["type"] = "log"
+    if curve.get("range") is not None:
+        lo, hi = curve["range"]
+        # Plotly takes the range of a log axis in log10 units.
+        props["range"] = (
+            [numpy.log10(lo), numpy.log10(hi)] if curve["log"] else [lo, hi]
+        )
+    return props
+
+
+def _fraction(values, curve):
+    """Position of values across the width of a curve's axis, from 0 to 1."""
+    lo, hi = curve["range"]
+    if curve["log"]:
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            values, lo, hi = numpy.log10(values), numpy.log10(lo), numpy.log10(hi)
+    return (values - lo) / (hi - lo)
+
+
+def _curve_trace(curve):
+    line = {"width": curve.get("width", 1)}
+    if curve.get("color") is not None:
+        line["color"] = curve["color"]
+    if curve.get("dash") is not None:
+        line["dash"] = curve["dash"]
+    return go.Scatter(x=[], y=[], name=curve["name"], mode="lines", line=line)
+
+
+def _fill_traces(name, colors):
+    """One fill trace per sign with a colour; None colours are skipped."""
+    traces = []
+    for sign, color in zip(("positive", "negative"), colors):
+        if color is None:
+            continue
+        traces.append(
+            (
+                sign,
+                go.Scatter(
+                    x=[],
+                    y=[],
+                    name=f"{name} ({sign})",
+                    mode="lines",
+                    fill="toself",
+                    fillcolor=color,
+                    line={"width": 0},
+                    hoverinfo="skip",
+                    showlegend=False,
+                ),
+            )
+        )
+    return traces
+
+
+def _interval_bands(df, column, text, seaborn_palette):
+    """Heatmap data for an interval table: one band per change of interval."""
+    bounds = numpy.unique(df[["depth_from", "depth_to"]].to_numpy(dtype=float))
+    bounds = bounds[numpy.isfinite(bounds)]
+    if bounds.size < 2:
+        return None
+    middle = (bounds[:-1] + bounds[1:]) / 2
+    labels = resample_intervals(df, middle, column=column)
+    texts = labels if text == column else resample_intervals(df, middle, column=text)
+
+    unique_labels = list(dict.fromkeys(df.sort_values("depth_from")[column]))
+    codes = {label: i for i, label in enumerate(unique_labels)}
+    palette = sns.color_palette(seaborn_palette, len(unique_labels))
+    colours = [to_plotly_rgb(*c) for c in palette]
+    if "colour" in df:
+        given = df.dropna(subset=["colour"]).drop_duplicates(column)
+        for label, colour in zip(given[column], given["colour"]):
+            colours[codes[label]] = colour
+
+    n = len(unique_labels)
+    colorscale = []
+    for i, colour in enumerate(colours):
+        colorscale += [[i / n, colour], [(i + 1) / n, colour]]
+    z = numpy.array(
+        [codes[label] if label is not None else numpy.nan for label in labels],
+        dtype=float,
+    )
+    return {
+        "x": [0, 1],
+        "y": bounds,
+        "z": z[:, None],
+        "text": numpy.array(
+            [
+                f"{t} ({top:.0f}-{base:.0f})" if t is not None else ""
+                for t, top, base in zip(texts, bounds[:-1], bounds[1:])
+            ],
+            dtype=object,
+        )[:, None],
+        "colorscale": colorscale,
+        "zmin": -0.5,
+        "zmax": n - 0.5,
+    }
+
+
+def _depth_range(depth, curves, intervals):
+    """Span every curve, or failing that every interval table."""
+    if curves:
+        valid = ~numpy.isnan(numpy.column_stack(list(curves.values()))).all(axis=1)
+        if valid.any():
+            return [float(depth[valid].max()), float(depth[valid].min())]
+    depths = [
+        table[["depth_from", "depth_to"]].to_numpy(dtype=float).ravel()
+        for table in intervals.values()
+        if table is not None
+    ]
+    depths = numpy.concatenate(depths) if depths else numpy.array([])
+    depths = depths[numpy.isfinite(depths)]
+    if depths.size:
+        return [float(depths.max()), float(depths.min())]
+    return None
+
+
+class LogTemplate:
+    """Composite log layout compiled once and reused for any number of wells.
+
+    The template is a list of tracks, each a dict with either:
+
+    - "curves": list of curve names or dicts with the keys "name", and
+      optionally "range" (e.g. ``[0.45, -0.15]`` for a reversed neutron
+      scale), "log", "color", "width" and "dash". The first curve uses the
+      track's x axis; later curves with a "range" each get their own x axis
+      overlaid on the track, so curves with different scales can share a
+      track. Other curves share the track's x axis.
+    - "intervals": name of an interval table to draw in the track, e.g.
+      stratigraphy or lithology (see ``draw_strat()``). Tables are given
+      to ``render()`` by this name. Optional keys are "column" (column
+      used to colour the intervals, default "label"), "text" (column shown
+      when hovering, default *column*) and "palette" (seaborn palette used
+      for intervals without a "colour" column).
+
+    Any track can also have a "title" (default the curve names or interval
+    table name), "log" (default for its curves, False) and "width" (relative
+    to the other tracks, default 1). Curve tracks can have a "fill" dict, or
+    a list of them, with the keys "curves" (pair of curve names) and
+    "colors" (fill colours where the first curve plots to the right / left
+    of the second, either can be None; default ``("lightblue", None)``).
+    Where the two curves have different scales the fill is computed across
+    the track as drawn, so both curves need a "range".
+
+    For example::
+
+        template = LogTemplate(
+            [
+                {"curves": ["ECGR"], "title": "Gamma"},
+                {"curves": ["ATRT", "ATRX"], "log": True},
+                {
+                    "curves": [
+                        {"name": "TNPH", "range": [0.45, -0.15], "color": "blue"},
+                        {"name": "HROM", "range": [1.95, 2.95], "color": "red"},
+                    ],
+                    "fill": {"curves": ["TNPH", "HROM"], "colors": ["yellow", None]},
+                },
+                {"intervals": "strat", "width": 0.5},
+            ],
+            height=800,
+        )
+        fig = template.render(df, intervals={"strat": strat_df})
+
+    The figure layout, axes and trace styles are built once when the
+    template is created. ``render()`` then only copies the compiled figure
+    and fills in the data arrays, so rendering the same template for many
+    wells costs little more than getting the data.
+
+    Args:
+        tracks (list of dicts): see above.
+
+    Other keyword arguments are added to the figure layout, e.g. "height".
+
+    """
+
+    def __init__(self, tracks, **layout_kwargs):
+        self.tracks = [dict(track) for track in tracks]
+        self._slots = []
+        self._skeleton = self._compile(layout_kwargs)
+
+    @property
+    def curve_names(self):
+        """Names of all the curves in the template."""
+        names = [
+            _curve_spec(curve, track)["name"]
+            for track in self.tracks
+            for curve in track.get("curves", [])
+        ]
+        return list(dict.fromkeys(names))
+
+    def _add(self, log, trace, track_no):
+        log.add_trace(trace, track_no=track_no)
+        return len(log.fig.data) - 1
+
+    def _add_overlay(self, log, traces, track_no, axis_kwargs):
+        log.add_overlay_traces(traces, track_no=track_no, axis_kwargs=axis_kwargs)
+        return list(range(len(log.fig.data) - len(traces), len(log.fig.data)))
+
+    def _compile(self, layout_kwargs):
+        kwargs = {}
+        if any("width" in track for track in self.tracks):
+            kwargs["column_widths"] = [track.get("width", 1) for track in self.tracks]
+        log = WellLog(n_tracks=len(self.tracks), **kwargs)
+
+        layout = {}
+        for track_no, track in enumerate(self.tracks):
+            xaxis = AxisAllocator.layout_key("x", track_no + 1)
+
+            if "intervals" in track:
+                log.update_track_titles(
+                    {track_no: track.get("title", track["intervals"])}
+                )
+                i = self._add(
+                    log,
+                    go.Heatmap(
+                        x=[0, 1],
+                        y=[],
+                        z=[],
+                        name=track["intervals"],
+                        hoverinfo="text+y",
+                        showscale=False,
+                    ),
+                    track_no,
+                )
+                column = track.get("column", "label")
+                self._slots.append(
+                    (
+                        i,
+                        "intervals",
+                        (
+                            track["intervals"],
+                            column,
+                            track.get("text", column),
+                            track.get("palette", "pastel"),
+                        ),
+                    )
+                )
+                layout[xaxis] = {"range": [0, 1], "showticklabels": False}
+                continue
+
+            curves = [_curve_spec(curve, track) for curve in track["curves"]]
+            by_name = {curve["name"]: curve for curve in curves}
+            log.update_track_titles({track_no: track.get("title", ", ".join(by_name))})
+            fills = _fill_specs(track)
+
+            # Curves sharing the track's x axis, and curves with their own.
+            shared = [curves[0]] + [c for c in curves[1:] if c.get("range") is None]
+            own = [c for c in curves[1:] if c.get("range") is not None]
+            across = [
+                fill
+                for fill in fills
+                if not all(by_name[name] in shared for name in fill["curves"])
+            ]
+            if across:
+                # Fills are drawn across the track as a fraction of its width
+                # on the track's own axis, which plotly draws beneath the
+                # overlaid axes, so every curve needs an overlaid axis.
+                for fill in across:
+                    for name in fill["curves"]:
+                        if by_name[name].get("range") is None:
+                            raise ValueError(
+                                f"Curve '{name}' needs a 'range' to be filled "
+                                "against a curve on a different scale"
+                            )
+                shared, own = [], curves
+                layout[xaxis] = {"range": [0, 1], "visible": False}
+            else:
+                layout[xaxis] = _axis_props(curves[0])
+
+            for fill in fills:
+                a, b = fill["curves"]
+                mode = "fraction" if fill in across else "values"
+                for sign, trace in _fill_traces(
+                    f"{a}/{b}", fill.get("colors", ("lightblue", None))
+                ):
+                    i = self._add(log, trace, track_no)
+                    self._slots.append(
+                        (i, "fill", (by_name[a], by_name[b], sign, mode))
+                    )
+
+            for curve in shared:
+                i = self._add(log, _curve_trace(curve), track_no)
+                self._slots.append((i, "curve", curve["name"]))
+            if own:
+                indices = self._add_overlay(
+                    log,
+                    [_curve_trace(curve) for curve in own],
+                    track_no,
+                    [_axis_props(curve) for curve in own],
+                )
+                for i, curve in zip(indices, own):
+                    self._slots.append((i, "curve", curve["name"]))
+
+        log.fig.update_layout(layout)
+        log.fig.update_yaxes(autorange="reversed")
+        log.fig.update_layout(template="plotly_white", **layout_kwargs)
+        return log.fig.to_dict()
+
+    def render(self, df, intervals=None):
+        """Fill the compiled layout with the data of one well.
+
+        Args:
+            df (pandas.DataFrame): the index should be the depth. Curves
+                missing from *df* are left empty.
+            intervals (dict, optional): interval table name to
+                pandas.DataFrame, for the "intervals" tracks.
+
+        Returns: dict with "data" and "layout", which can be used directly
+            as the ``figure`` of a ``dcc.Graph`` or passed to ``go.Figure``.
+            The layout is shared between renders and should not be modified.
+
+        """
+        intervals = intervals or {}
+        depth = df.index.to_numpy(dtype=float)
+        curves = {
+            name: df[name].to_numpy(dtype=float)
+            for name in self.curve_names
+            if name in df
+        }
+        data = [dict(trace) for trace in self._skeleton["data"]]
+
+        for i, kind, spec in self._slots:
+            if kind == "curve":
+                if spec in curves:
+                    data[i].update(x=curves[spec], y=depth)
+            elif kind == "fill":
+                a, b, sign, mode = spec
+                if a["name"] not in curves or b["name"] not in curves:
+                    continue
+                values_a, values_b = curves[a["name"]], curves[b["name"]]
+                if mode == "fraction":
+                    values_a, values_b = _fraction(values_a, a), _fraction(values_b, b)
+                x, y = crossover_polygons(depth, values_a, values_b)[sign]
+                data[i].update(x=x, y=y)
+            else:
+                name, column, text, palette = spec
+                if intervals.get(name) is None:
+                    continue
+                bands = _interval_bands(intervals[name], column, text, palette)
+                if bands is not None:
+                    data[i].update(bands)
+
+        layout = dict(self._skeleton["layout"])
+        y_range = _depth_range(depth, curves, intervals)
+        if y_range is not None:
+            layout["yaxis"] = {
+                **layout["yaxis"],
+                "range": y_range,
+                "autorange": False,
+            }
+        return {"data": data, "layout": layout}
+
+    def render_figure(self, df, intervals=None):
+        """As ``render()`` but returns a plotly Figure.
+
+        Building the Figure validates the whole figure again, so prefer
+        ``render()`` where a dict will do (e.g. Dash callbacks).
+        """
+        return go.Figure(self.render(df, intervals=intervals))
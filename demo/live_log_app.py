@@ -0,0 +1,56 @@
+# Live log viewer: new samples are appended to the figure with extendData
+# instead of rebuilding it.
+#
+#   python live_log_app.py                   # simulated feed, 20 curves at 100 samples/s
+#   python live_log_app.py growing_file.las  # tail an LAS file as it is written
+import sys
+
+import dash
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from dashwellviz.streaming import LiveLog, SimulatedSource, TailingLASSource
+
+if len(sys.argv) > 1:
+    source = TailingLASSource(sys.argv[1])
+    curves = ['ECGR', 'DTCO', 'RHOZ', 'HROM']
+else:
+    curves = [f'CURVE{i + 1}' for i in range(20)]
+    source = SimulatedSource(curves, rate=100)
+
+live_log = LiveLog(source, curves, max_points=5000)
+
+app = dash.Dash(__name__)
+
+
+def serve_layout():
+    # Built for every page load, so new viewers start from the buffered samples
+    fig, sample_no = live_log.make_figure()
+    fig.update_layout(height=800, showlegend=False)
+    return html.Div(children=[
+        html.H1(children='Live log'),
+        dcc.Graph(id='live-log', figure=fig),
+        # number of the last sample drawn by this viewer
+        dcc.Store(id='live-log-sample', data=sample_no),
+        dcc.Interval(id='interval', interval=500),
+    ])
+
+
+app.layout = serve_layout
+
+
+@app.callback(
+    [Output('live-log', 'extendData'), Output('live-log-sample', 'data')],
+    [Input('interval', 'n_intervals')],
+    [State('live-log-sample', 'data')])
+def update_live_log(n_intervals, sample_no):
+    update, sample_no = live_log.extend_data(since=sample_no)
+    if update is None:
+        raise PreventUpdate
+    return update, sample_no
+
+
+if __name__ == '__main__':
+    app.run_server(debug=True, host='localhost')
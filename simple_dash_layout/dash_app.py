@@ -3,15 +3,24 @@ from dash import Dash
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output
-
-import plotly.graph_objs as go
+from dash.exceptions import PreventUpdate
 
 import dashwellviz.figures
+from dashwellviz.locations import WellLocations, load_well_headers, make_well_map
+from dashwellviz.shared import SharedWellStore, file_version
+from dashwellviz.stats import make_histogram, summarize_well
 import helper
 
 # Load Data
-data_df = helper.load_data()
-data_df = helper.add_vp_vs(data_df)
+# Each well is loaded once into shared memory and shared read-only by all
+# gunicorn workers. It is reloaded when the LAS file or the helper code changes
+well_store = SharedWellStore(
+    lambda well_name: helper.add_vp_vs(helper.load_data()),
+    version=lambda well_name: file_version('Data/Poseidon1Decim.LAS', helper.__file__),
+)
+data_df = well_store.get('Poseidon 1')
+# Curve statistics are computed once here; histograms are drawn from them
+data_summaries = summarize_well(data_df)
 
 # set up options for dropdown selectors
 data_labels_dict = [{'label': c, 'value': c} for c in data_df.columns]
@@ -27,30 +36,17 @@ well_names_labels_dict = [{'label': w, 'value': w} for w in list_of_well_names]
 
 log_trace_fig = helper.composite_plot_from_list_of_log_names(data_df, ['ECGR', 'Vp', 'Vs', 'HROM'])
 
-# TODO this needs to be abstracted
-# make cross plot 
-fig = go.Figure(data=go.Scatter(
-    x = data_df['Vp'],
-    y = data_df['Vs'],
-    mode='markers',
-    opacity=0.7,
-    marker=dict(
-        size=8,
-        color=data_df['ECGR'], #set color equal to a variable
-        colorscale='turbid', # one of plotly colorscales
-        line=dict(
-            color='black',
-            width=1
-        ),
-        showscale=True
-    )
-))
-fig.update_xaxes(title_text='Vp')
-fig.update_yaxes(title_text='Vs')
-fig.update_layout(template='plotly_white', height=800, width=800, title_text="Vp Vs Xplot - coloured by GR")
+# make cross plot
+fig = dashwellviz.figures.make_cross_plot(data_df, 'Vp', 'Vs', color='ECGR')
+fig.update_layout(height=800, width=800, title_text="Vp Vs Xplot - coloured by GR")
+
+# Well locations for the map
+well_locations = WellLocations.from_headers(load_well_headers('Data/Well_Headers.csv'))
 
 # Create the app
 app = dash.Dash(__name__)
+# Create server variable with Flask server object for use with gunicorn
+server = app.server
 
 # Create app layout
 app.layout = html.Div([
@@ -84,7 +80,7 @@ app.layout = html.Div([
             
             html.H2('Histogram Options'),
             html.H4('Histogram Column'),
-            dcc.Dropdown(id='hist-column', placeholder='Select a log curve', options=data_labels_dict),
+            dcc.Dropdown(id='hist-column', placeholder='Select a log curve', options=data_labels_dict, value='ECGR'),
         ]),
 
         html.Div([
@@ -93,6 +89,10 @@ app.layout = html.Div([
                 dcc.Graph(id='log-trace-plot', figure=log_trace_fig) 
             ]),
         ]),
+
+        # Periodically frees wells nobody has looked at for a while
+        dcc.Interval(id='evict-interval', interval=60 * 1000),
+        html.Div(id='evicted-wells', style={'display': 'none'}),
     
         html.Div(className='other-plot-container', children=[
             html.H1('Other Plots Can Go Here'),
@@ -100,6 +100,8 @@ app.layout = html.Div([
             html.Div(children=[
                 dcc.Graph(id='single-w-cross-plot', figure=fig),                
                 dcc.Graph(id='single-w-cross-plot2', figure=fig),
+                dcc.Graph(id='histogram'),
+                dcc.Graph(id='well-map', figure=make_well_map(well_locations)),
             ]),
 
         ]),
@@ -115,28 +117,21 @@ app.layout = html.Div([
     Input('x-plot-color', 'value')])
 def update_cross_plot(y_axis, x_axis, color):
 
-    # Update cross plot 
-    # TODO this really, really needs to be abstracted 
-    fig = go.Figure(data=go.Scatter(
-        x = data_df[x_axis],
-        y = data_df[y_axis],
-        mode='markers',
-        opacity=0.7,
-        marker=dict(
-            size=8,
-            color=data_df[color], #set color equal to a variable
-            colorscale='turbid', # one of plotly colorscales
-            line=dict(
-                color='black',
-                width=1
-            ),
-            showscale=True
-        )
-    ))
-    fig.update_xaxes(title_text=x_axis)
-    fig.update_yaxes(title_text=y_axis)
-    fig.update_layout(template='plotly_white', height=800, width=800, title_text=f"Vp Vs Xplot - coloured by {color}")
+    data_df = well_store.get('Poseidon 1')
+    fig = dashwellviz.figures.make_cross_plot(data_df, x_axis, y_axis, color=color)
+    fig.update_layout(height=800, width=800, title_text=f"Vp Vs Xplot - coloured by {color}")
+
+    return fig
 
+# Histogram of the selected curve
+@app.callback(
+    Output('histogram', 'figure'),
+    [Input('hist-column', 'value')])
+def update_histogram(column):
+    if column is None:
+        raise PreventUpdate
+    fig = make_histogram(data_summaries[(column, None)], name=column)
+    fig.update_layout(height=500, width=800)
     return fig
 
 # well dropdown. Currently updates log plot title
@@ -146,13 +141,41 @@ def update_cross_plot(y_axis, x_axis, color):
 def update_well_name_in_title(value):
     return value
 
+# Well map: highlight the selected well and its neighbours, and re-cluster
+# the wells to the current zoom
+@app.callback(
+    Output('well-map', 'figure'),
+    [Input('well-selector', 'value'),
+    Input('well-map', 'relayoutData')])
+def update_well_map(well_name, relayout_data):
+    bounds = None
+    if relayout_data and 'xaxis.range[0]' in relayout_data and 'yaxis.range[0]' in relayout_data:
+        bounds = (relayout_data['xaxis.range[0]'], relayout_data['yaxis.range[0]'],
+                  relayout_data['xaxis.range[1]'], relayout_data['yaxis.range[1]'])
+
+    highlight = []
+    # Header names use underscores e.g. 'Poseidon_1'
+    well_name = (well_name or '').replace(' ', '_')
+    if well_name in well_locations.names:
+        highlight = [well_name] + list(well_locations.nearby(well_name, n=3).name)
+
+    return make_well_map(well_locations, bounds=bounds, highlight=highlight)
+
 # Choose the displayed log curves from checkbox
 @app.callback(
     Output('log-trace-plot', 'figure'),
     [Input('curve-selectors', 'value')])
 def update_log_plots_on_curve_selection(curve_names):
+    data_df = well_store.get('Poseidon 1')
     return helper.composite_plot_from_list_of_log_names(data_df, curve_names)
 
+# Release and remove wells which have gone cold
+@app.callback(
+    Output('evicted-wells', 'children'),
+    [Input('evict-interval', 'n_intervals')])
+def evict_cold_wells(n_intervals):
+    return ', '.join(well_store.evict_cold())
+
 # Run the app
 if __name__ == '__main__':
     app.run_server(debug=True, host='localhost')
\ No newline at end of file
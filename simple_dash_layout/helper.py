@@ -1,8 +1,11 @@
 # TODO this file should probably only be ephemere during developement and used to abstract the  dash app
 
+import functools
+
 import dash_html_components as html
 
-import dashwellviz
+from dashwellviz.qc import RESISTIVITY_CURVES
+from dashwellviz.templates import LogTemplate
 from welly import Well
 import pandas as pd
 
@@ -47,23 +50,35 @@ def get_header():
         ]
     )
 
+@functools.lru_cache(maxsize=32)
+def track_template(curve_names):
+    """Compiled log template with one track per curve
+
+    Templates are compiled once per combination of curves and reused for every well.
+    Resistivity curves are drawn on logarithmic tracks.
+
+    Args:
+        curve_names (tuple): curve names, one per track
+    Returns:
+        dashwellviz.templates.LogTemplate
+    """
+    return LogTemplate(
+        [{'curves': [curve], 'log': curve in RESISTIVITY_CURVES} for curve in curve_names],
+        height=800,
+        width=800,
+    )
+
 def composite_plot_from_list_of_log_names(data_df, curve_names):
 
     """Abstraction for creating the log plot from the checkbox
 
-    In order to work with the checkbox idea, the plot constructor will need to accept a list of logs.
-    I think that means for now, that means we are restricted to only one log per track, and no logoritmic tracks. 
-    We will need to find a better way to select the logs and define track properties
-    
+    The layout comes from ``track_template()``, so only the data is filled in on each call.
+    For several curves per track, fills or strat/lith tracks, build a
+    ``dashwellviz.templates.LogTemplate`` directly.
+
     Args:
         curve_names (list): List of curve names to plot
     Returns:
-        plotly figure
+        dict: plotly figure
     """
-    log = dashwellviz.figures.make_composite_log(
-        data_df, lines=[[curve] for curve in curve_names]
-    )
-
-    log_trace_fig = log.fig
-    log_trace_fig.update_layout(template='plotly_white', height=800, width=800)
-    return log_trace_fig
\ No newline at end of file
+    return track_template(tuple(curve_names)).render(data_df)